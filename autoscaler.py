@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+AIMD auto-scaling of crawler browsers
+Adds worker browsers one at a time while per-business latency, error rate and
+host headroom stay healthy, and halves them as soon as any of those degrade.
+"""
+
+import os
+import queue
+import statistics
+import threading
+import time
+
+from driver_metrics import CommandBudgetExceeded
+from page_detector import BlockedError
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def host_headroom():
+    """(free CPU fraction, free memory fraction) of this machine."""
+    if psutil:
+        cpu_free = 1 - psutil.cpu_percent(interval=None) / 100
+        memory = psutil.virtual_memory()
+        return cpu_free, memory.available / memory.total
+
+    cpu_free = 1.0
+    if hasattr(os, 'getloadavg'):
+        cpu_free = max(0.0, 1 - os.getloadavg()[0] / (os.cpu_count() or 1))
+
+    mem_free = 1.0
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            meminfo = dict(line.split(':', 1) for line in f)
+        mem_free = int(meminfo['MemAvailable'].split()[0]) / int(meminfo['MemTotal'].split()[0])
+    except (OSError, KeyError, ValueError):
+        pass
+    return cpu_free, mem_free
+
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease on the number of workers.
+    Every `window` finished businesses the controller either adds `increase`
+    workers (healthy window) or multiplies the target by `decrease`. Running
+    out of host headroom decreases without waiting for a full window, but at
+    most once per `cooldown` seconds, so the host can recover in between.
+    """
+
+    def __init__(self, min_workers=1, max_workers=6, increase=1, decrease=0.5, window=10,
+                 max_latency=20.0, latency_factor=1.5, max_error_rate=0.15,
+                 min_cpu_free=0.2, min_mem_free=0.15, headroom=host_headroom, cooldown=30.0):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.max_latency = max_latency
+        self.latency_factor = latency_factor
+        self.max_error_rate = max_error_rate
+        self.min_cpu_free = min_cpu_free
+        self.min_mem_free = min_mem_free
+        self.headroom = headroom
+        self.cooldown = cooldown
+        self.last_decrease = None
+        self.target = min_workers
+        self.best_latency = None
+        self.samples = []
+        self.lock = threading.Lock()
+
+    def record(self, latency, ok=True, timeout=False):
+        with self.lock:
+            self.samples.append((latency, ok, timeout))
+
+    def adjust(self):
+        """Apply one AIMD step if a full window of samples is in; returns the target."""
+        with self.lock:
+            samples = self.samples
+            if len(samples) >= self.window:
+                self.samples = []
+        if len(samples) < self.window:
+            # Out of headroom is urgent enough not to wait for a full window
+            if not self._cooling_down() and not self._has_headroom():
+                self._decrease("host out of headroom")
+            return self.target
+
+        latencies = [latency for latency, ok, _ in samples if ok]
+        latency = statistics.median(latencies) if latencies else None
+        error_rate = sum(1 for _, ok, timeout in samples if not ok or timeout) / len(samples)
+
+        if error_rate > self.max_error_rate:
+            self._decrease(f"error rate {error_rate:.0%}")
+        elif latency is None or latency > self.max_latency:
+            self._decrease("latency over limit")
+        elif self.best_latency and latency > self.best_latency * self.latency_factor:
+            self._decrease(f"latency {latency:.1f}s vs best {self.best_latency:.1f}s")
+        elif not self._has_headroom():
+            self._decrease("host out of headroom")
+        else:
+            if self.best_latency is None or latency < self.best_latency:
+                self.best_latency = latency
+            if self.target < self.max_workers:
+                self.target = min(self.max_workers, self.target + self.increase)
+                print(f"[autoscale] {self.target} workers (median {latency:.1f}s per business)")
+        return self.target
+
+    def _has_headroom(self):
+        cpu_free, mem_free = self.headroom()
+        return cpu_free >= self.min_cpu_free and mem_free >= self.min_mem_free
+
+    def _cooling_down(self):
+        return self.last_decrease is not None and time.time() - self.last_decrease < self.cooldown
+
+    def _decrease(self, reason):
+        self.last_decrease = time.time()
+        target = max(self.min_workers, int(self.target * self.decrease))
+        if target != self.target:
+            self.target = target
+            print(f"[autoscale] {self.target} workers ({reason})")
+        with self.lock:
+            self.samples = []
+
+
+class WorkerPool:
+    """
+    Runs tasks on up to `controller.target` browsers. `factory()` creates a
+    scraper per worker; `handle(scraper, task)` returns a result, None to
+    retry the task later, or False to finish it without a result. Workers keep their browser between run() calls and
+    wait for the next batch; workers above the target retire after their
+    current task. A task failing with one of `restart_on` (a dead browser)
+    is retried and the worker's scraper is replaced. close() shuts every
+    browser down.
+    """
+
+    def __init__(self, factory, controller=None, max_attempts=3, interval=1.0, restart_on=()):
+        self.factory = factory
+        self.restart_on = restart_on
+        self.controller = controller or AIMDController()
+        self.max_attempts = max_attempts
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.tasks = queue.Queue()
+        self.slots = {}
+        self.handle = None
+        self.pending = 0
+        self.busy = 0
+        self.results = []
+        self.failed = []
+        self.error = None
+        self.deadline = None
+        self.closed = False
+
+    def run(self, tasks, handle, deadline=None):
+        """Results of every task that succeeded; stops handing out tasks once time.time() passes `deadline`."""
+        with self.lock:
+            self.handle = handle
+            self.pending = len(tasks)
+            self.results = []
+            self.failed = []
+            self.error = None
+            self.deadline = deadline
+            for task in tasks:
+                self.tasks.put((task, 1))
+
+        while self.pending > 0 and self.error is None:
+            if self._expired():
+                print(f"[pool] Time budget used up - leaving {self.pending} tasks")
+                break
+            target = self.controller.adjust()
+            with self.lock:
+                self.slots = {slot: worker for slot, worker in self.slots.items() if worker.is_alive()}
+                slot = 0
+                while len(self.slots) < min(target, self.pending):
+                    while slot in self.slots:
+                        slot += 1
+                    worker = threading.Thread(target=self._work, args=(slot,), daemon=True)
+                    self.slots[slot] = worker
+                    worker.start()
+            time.sleep(self.interval)
+
+        # Let the tasks in flight finish, then drop the ones nobody picked up,
+        # so the idle workers start the next run with an empty queue
+        with self.lock:
+            self.handle = None
+        while self.busy > 0:
+            time.sleep(0.05)
+        with self.lock:
+            while not self.tasks.empty():
+                self.tasks.get_nowait()
+        if self.error:
+            raise self.error
+        return self.results
+
+    def close(self):
+        self.closed = True
+        for worker in list(self.slots.values()):
+            worker.join()
+        self.slots = {}
+
+    def _expired(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def stopping(self):
+        """True once the pool is closing, failed or out of time; long waits inside a task should end."""
+        return self.closed or self.error is not None or self._expired()
+
+    def _restart(self, slot, scraper):
+        """A fresh scraper in place of one whose browser died, or None if none starts."""
+        try:
+            scraper.close()
+        except Exception:
+            pass
+        try:
+            return self.factory()
+        except Exception as e:
+            print(f"[worker {slot}] Could not restart browser: {e}")
+            return None
+
+    def _work(self, slot):
+        try:
+            scraper = self.factory()
+        except Exception as e:
+            print(f"[worker {slot}] Could not start browser: {e}")
+            if slot == 0:
+                # Not even one browser starts, so more workers won't help
+                self.error = e
+            self.controller.record(0, ok=False)
+            return
+
+        try:
+            while not self.closed and self.error is None and slot < self.controller.target:
+                task = None
+                with self.lock:
+                    if self.handle is not None and not self.tasks.empty():
+                        task, attempts = self.tasks.get_nowait()
+                        handle = self.handle
+                        self.busy += 1
+                if task is None:
+                    time.sleep(self.interval)
+                    continue
+
+                try:
+                    if self._expired():
+                        continue
+                    start = time.time()
+                    timeout = False
+                    restart = False
+                    try:
+                        result = handle(scraper, task)
+                    except (BlockedError, CommandBudgetExceeded) as e:
+                        self.error = e
+                        break
+                    except self.restart_on as e:
+                        print(f"[worker {slot}] Browser failed, restarting it: {e}")
+                        result = None
+                        restart = True
+                        timeout = 'Timeout' in type(e).__name__
+                    except Exception as e:
+                        print(f"[worker {slot}] Error: {e}")
+                        result = None
+                        timeout = 'Timeout' in type(e).__name__
+                    self.controller.record(time.time() - start, ok=result is not None, timeout=timeout)
+
+                    with self.lock:
+                        if result is not None:
+                            if result is not False:
+                                self.results.append(result)
+                            self.pending -= 1
+                        elif attempts < self.max_attempts:
+                            self.tasks.put((task, attempts + 1))
+                        else:
+                            self.failed.append(task)
+                            self.pending -= 1
+                    if restart:
+                        scraper = self._restart(slot, scraper)
+                        if scraper is None:
+                            break
+                finally:
+                    with self.lock:
+                        self.busy -= 1
+        finally:
+            if scraper is not None:
+                scraper.close()
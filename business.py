@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Shared business record model
+One compact record type for every scraper and output writer. Categories and
+locality suffixes ("Battle Creek, MI 49017") are interned, so a large crawl
+keeps one copy of each instead of one per business.
+"""
+
+import csv
+import json
+import re
+import sys
+from collections import Counter
+
+
+# "Battle Creek, MI 49017", "Battle Creek, Michigan", optionally followed by ", USA"
+LOCALITY = (r'(?P<city>[^,]+),\s*(?P<state>[A-Za-z][A-Za-z ]*?)(?:\s+(?P<zip>\d{5})(?:-\d{4})?)?'
+            r'(?:,\s*(?:USA|United States))?')
+LOCALITY_PARTS = re.compile(LOCALITY + r'\s*$')
+
+# "..., Battle Creek, MI 49017" -> street part, locality part
+LOCALITY_PATTERN = re.compile(r'^(?P<street>.*?),\s*(?P<locality>' + LOCALITY + r')\s*$')
+
+
+def split_address(address):
+    """(street, interned locality) of an address; locality is '' if it can't be recognised."""
+    address = (address or '').strip()
+    match = LOCALITY_PATTERN.match(address)
+    if not match:
+        return address, ''
+    return match.group('street'), sys.intern(match.group('locality'))
+
+
+def _intern(value):
+    return sys.intern(value) if value else ''
+
+
+class Business:
+    __slots__ = ('name', 'street', 'locality', 'phone', 'website', 'rating', 'category', 'notes')
+
+    FIELDS = ('name', 'address', 'phone', 'website', 'has_website', 'rating', 'category', 'notes')
+
+    def __init__(self, name='', address='', phone='', website='', rating='', category='', notes=''):
+        self.name = name
+        self.street, self.locality = split_address(address)
+        self.phone = phone
+        self.website = website
+        self.rating = _intern(rating)
+        self.category = _intern(category)
+        self.notes = notes
+
+    @property
+    def address(self):
+        if self.street and self.locality:
+            return f"{self.street}, {self.locality}"
+        return self.street or self.locality
+
+    @address.setter
+    def address(self, value):
+        self.street, self.locality = split_address(value)
+
+    @property
+    def has_website(self):
+        return bool(self.website)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data.get(field) or '' for field in
+                      ('name', 'address', 'phone', 'website', 'rating', 'category', 'notes')})
+
+    def to_dict(self, fields=FIELDS):
+        return {field: getattr(self, field) for field in fields}
+
+    def to_row(self, fields=FIELDS):
+        return [getattr(self, field) for field in fields]
+
+    def __repr__(self):
+        return f"Business({self.name!r}, {self.address!r})"
+
+
+class BusinessBatch:
+    """Column-per-field container for analytics over many businesses."""
+
+    __slots__ = ('columns',)
+
+    COLUMNS = Business.__slots__
+
+    def __init__(self, businesses=()):
+        self.columns = {column: [] for column in self.COLUMNS}
+        self.extend(businesses)
+
+    def append(self, business):
+        for column, values in self.columns.items():
+            values.append(getattr(business, column))
+
+    def extend(self, businesses):
+        for business in businesses:
+            self.append(business)
+
+    def __len__(self):
+        return len(self.columns['name'])
+
+    def __getitem__(self, index):
+        business = Business.__new__(Business)
+        for column, values in self.columns.items():
+            setattr(business, column, values[index])
+        return business
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def column(self, field):
+        if field == 'has_website':
+            return [bool(website) for website in self.columns['website']]
+        if field == 'address':
+            return [business.address for business in self]
+        return self.columns[field]
+
+    def counts(self, field):
+        return Counter(self.column(field))
+
+    def without_website(self):
+        return BusinessBatch(business for business in self if not business.has_website)
+
+    def to_rows(self, fields=Business.FIELDS):
+        columns = [self.column(field) for field in fields]
+        return [list(row) for row in zip(*columns)]
+
+
+def write_csv(businesses, filename, fields=Business.FIELDS):
+    with open(filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        writer.writerows(business.to_row(fields) for business in businesses)
+
+
+def write_json(businesses, filename, fields=Business.FIELDS):
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump([business.to_dict(fields) for business in businesses], f, indent=2, ensure_ascii=False)
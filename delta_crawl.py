@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Delta crawl support for repeated category sweeps
+Fingerprints every business record, keeps the fingerprints from the previous
+run, and reports only new, changed and disappeared businesses.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+
+from business import Business
+
+
+FINGERPRINT_FIELDS = ['name', 'address', 'phone', 'website']
+
+# Card text that changes with the time of day or with new reviews, not with the business
+VOLATILE_CARD_PART = re.compile(
+    r'(?i)\b(open|opens|closed|closes|closing soon|opening soon|24 hours)\b|^[\d.,()\s]+$'
+)
+
+
+def _normalize(value):
+    return re.sub(r'\s+', ' ', str(value or '')).strip().lower()
+
+
+def _digest(parts):
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def business_key(business):
+    """Stable identity of a business across runs (name + address)."""
+    return _digest([_normalize(business.name), _normalize(business.address)])
+
+
+def business_fingerprint(business):
+    """Fingerprint of the fields we track for changes."""
+    return _digest([_normalize(getattr(business, field)) for field in FINGERPRINT_FIELDS])
+
+
+def stable_card_parts(card):
+    """Card text parts (category, address line, ...) minus hours status, rating and review count."""
+    parts = [_normalize(part).strip('·⋅ ') for part in card.get('parts', [])]
+    return [part for part in parts if part and not VOLATILE_CARD_PART.search(part)]
+
+
+def card_fingerprint(card):
+    """
+    Fingerprint of a result card as shown in the list, before opening its
+    detail pane: name, stable text parts and whether a Website button shows.
+    """
+    return _digest([_normalize(card.get('name'))] + stable_card_parts(card) + [str(bool(card.get('website')))])
+
+
+class DeltaTracker:
+    def __init__(self, state_file="crawl_state.json"):
+        self.state_file = state_file
+        self.previous = {}
+        self.previous_cards = {}
+        self.current = {}
+        self.current_cards = {}
+        self.seen_names = set()
+        self.queries = set()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.state_file):
+            return
+        with open(self.state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.previous = state.get('records', {})
+        self.previous_cards = state.get('cards', {})
+
+    def start_query(self, query):
+        self.queries.add(query)
+
+    def abandon_query(self, query):
+        """A query cut short can't tell which businesses are gone; keep its previous records."""
+        self.queries.discard(query)
+
+    def see_card(self, card):
+        """Note a card listed in this run, whether or not its details could be extracted."""
+        self.seen_names.add(_normalize(card.get('name')))
+
+    def _listed(self, entry):
+        return _normalize(entry['record'].get('name')) in self.seen_names
+
+    def lookup_card(self, card_fp):
+        """Return the previous record for an unchanged list card, or None."""
+        key = self.previous_cards.get(card_fp)
+        if key is None or key not in self.previous:
+            return None
+        return Business.from_dict(self.previous[key]['record'])
+
+    def observe(self, business, query, card_fp=None):
+        key = business_key(business)
+        self.current[key] = {
+            'fingerprint': business_fingerprint(business),
+            'query': query,
+            'record': business.to_dict(),
+        }
+        if card_fp:
+            self.current_cards[card_fp] = key
+        return key
+
+    def compute_delta(self):
+        new, changed, disappeared = [], [], []
+
+        for key, entry in self.current.items():
+            old = self.previous.get(key)
+            if old is None:
+                new.append(entry['record'])
+            elif old['fingerprint'] != entry['fingerprint']:
+                changed_fields = [
+                    field for field in FINGERPRINT_FIELDS + ['has_website']
+                    if old['record'].get(field) != entry['record'].get(field)
+                ]
+                changed.append({
+                    'record': entry['record'],
+                    'previous': old['record'],
+                    'changed_fields': changed_fields,
+                })
+
+        # Only queries crawled in this run can tell us a business is gone, and
+        # only if its card is missing from the list (not just its details)
+        for key, old in self.previous.items():
+            if key not in self.current and old.get('query') in self.queries and not self._listed(old):
+                disappeared.append(old['record'])
+
+        return {'new': new, 'changed': changed, 'disappeared': disappeared}
+
+    def save(self):
+        # Carry over records from queries we didn't crawl this run, and records
+        # whose card was still listed but whose details failed to load
+        records = {
+            key: entry for key, entry in self.previous.items()
+            if entry.get('query') not in self.queries or (key not in self.current and self._listed(entry))
+        }
+        records.update(self.current)
+        cards = {
+            card_fp: key for card_fp, key in self.previous_cards.items()
+            if key in records and key not in self.current
+        }
+        cards.update(self.current_cards)
+
+        state = {
+            'updated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'records': records,
+            'cards': cards,
+        }
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+    def save_delta(self, filename="crawl_delta.json"):
+        delta = self.compute_delta()
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, indent=2, ensure_ascii=False)
+
+        print(f"\n--- DELTA SINCE LAST RUN ---")
+        print(f"New: {len(delta['new'])}")
+        print(f"Changed: {len(delta['changed'])}")
+        print(f"Disappeared: {len(delta['disappeared'])}")
+        for item in delta['changed'][:10]:
+            print(f"• {item['record']['name']} - changed {', '.join(item['changed_fields'])}")
+        print(f"Delta saved to {filename}")
+
+        return delta
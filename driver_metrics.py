@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+WebDriver round-trip accounting
+Counts and times every wire-protocol command a driver sends, attributed to the
+current query and business, and enforces a commands-per-business budget.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+
+class CommandBudgetExceeded(Exception):
+    pass
+
+
+class CommandCounter:
+    """
+    Wraps driver.execute, which every WebDriver and WebElement call goes
+    through. With strict=True a business that needs more than `budget`
+    commands raises CommandBudgetExceeded, so offline runs against local
+    stand-in pages catch round-trip regressions.
+    """
+
+    def __init__(self, driver, budget=None, strict=False):
+        self.budget = budget
+        self.strict = strict
+        self.totals = {}
+        self.businesses = []
+        self.violations = []
+        self.query = ""
+        self.current = None
+
+        self._execute = driver.execute
+        driver.execute = self._counted_execute
+
+    @classmethod
+    def from_env(cls, driver):
+        """Budget from GMAPS_COMMAND_BUDGET; GMAPS_COMMAND_BUDGET_STRICT=1 turns overruns into errors."""
+        budget = os.environ.get('GMAPS_COMMAND_BUDGET')
+        strict = os.environ.get('GMAPS_COMMAND_BUDGET_STRICT') == '1'
+        return cls(driver, int(budget) if budget else None, strict)
+
+    def _counted_execute(self, driver_command, params=None):
+        start = time.perf_counter()
+        try:
+            return self._execute(driver_command, params)
+        finally:
+            elapsed = time.perf_counter() - start
+            total = self.totals.setdefault(driver_command, [0, 0.0])
+            total[0] += 1
+            total[1] += elapsed
+            if self.current is not None:
+                counts = self.current['commands']
+                counts[driver_command] = counts.get(driver_command, 0) + 1
+                self.current['count'] += 1
+                self.current['seconds'] += elapsed
+
+    def set_query(self, query):
+        self.query = query
+
+    @contextmanager
+    def business(self, label):
+        """Attribute every command sent inside the block to one business."""
+        self.current = {'query': self.query, 'business': label, 'count': 0, 'seconds': 0.0, 'commands': {}}
+        try:
+            yield self.current
+        finally:
+            entry, self.current = self.current, None
+            self.businesses.append(entry)
+            self._check_budget(entry)
+
+    def _check_budget(self, entry):
+        if self.budget is None or entry['count'] <= self.budget:
+            return
+        self.violations.append(entry)
+        top = sorted(entry['commands'].items(), key=lambda item: item[1], reverse=True)[:3]
+        message = (f"{entry['business']} ({entry['query']}) used {entry['count']} WebDriver commands, "
+                   f"budget is {self.budget}: " + ", ".join(f"{name} x{count}" for name, count in top))
+        if self.strict:
+            raise CommandBudgetExceeded(message)
+        print(f"  Command budget exceeded - {message}")
+
+    def report(self):
+        if not self.totals:
+            return
+        total = sum(count for count, _ in self.totals.values())
+        seconds = sum(elapsed for _, elapsed in self.totals.values())
+        print(f"\n--- WEBDRIVER COMMANDS ---")
+        print(f"{total} commands, {seconds:.1f}s on the wire")
+        if self.businesses:
+            per_business = sum(entry['count'] for entry in self.businesses) / len(self.businesses)
+            print(f"{per_business:.1f} commands per business over {len(self.businesses)} businesses")
+        for name, (count, elapsed) in sorted(self.totals.items(), key=lambda item: item[1][0], reverse=True)[:10]:
+            print(f"  {name:<28} {count:>6}  {elapsed:6.1f}s")
+        if self.violations:
+            print(f"{len(self.violations)} businesses over the budget of {self.budget}")
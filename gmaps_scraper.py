@@ -5,23 +5,48 @@ Finds local businesses without websites for potential web development clients.
 """
 
 import time
-import csv
-import json
 import re
+import sys
 from urllib.parse import urlencode, urlparse
 import requests
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException
+from business import Business, write_csv, write_json
+from delta_crawl import DeltaTracker, card_fingerprint
+from link_classifier import get_classifier, collect_links
+from page_detector import PageGuard, BlockedError, PAGE_RESULTS, PAGE_DETAIL
+from query_planner import QueryPlanner, time_budget_from_args
+from driver_metrics import CommandCounter, CommandBudgetExceeded
+
+
+# Stable fields of every result card in the list, read in one round trip
+CARDS_SCRIPT = """
+return arguments[0].map(card => {
+    const link = card.querySelector('a.hfpxzc');
+    const title = card.querySelector('.qBF1Pd');
+    const parts = [];
+    card.querySelectorAll('.W4Efsd span').forEach(span => {
+        if (!span.children.length && span.innerText.trim()) parts.push(span.innerText.trim());
+    });
+    return {
+        name: title ? title.innerText : (link ? link.getAttribute('aria-label') || '' : ''),
+        parts: parts,
+        website: !!card.querySelector("a[data-value='Website'], a[aria-label*='ebsite']")
+    };
+});
+"""
 
 
 class GoogleMapsScraper:
-    def __init__(self, headless=True):
+    FIELDS = ['name', 'address', 'phone', 'rating', 'website', 'has_website']
+    
+    def __init__(self, headless=True, delta=False, state_file="crawl_state.json"):
         self.setup_driver(headless)
         self.results = []
+        self.delta = DeltaTracker(state_file) if delta else None
+        self.guard = PageGuard()
         
     def setup_driver(self, headless):
         chrome_options = Options()
@@ -34,32 +59,36 @@ class GoogleMapsScraper:
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
         self.driver = webdriver.Chrome(options=chrome_options)
+        self.commands = CommandCounter.from_env(self.driver)
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
-    def search_businesses(self, query, location="Battle Creek, Michigan"):
+    def search_businesses(self, query, location="Battle Creek, Michigan", max_results=None, deadline=None):
+        """Businesses for one search, or None if the results page didn't load."""
         search_url = f"https://www.google.com/maps/search/{urlencode({'q': f'{query} {location}'})}"
         print(f"Searching: {query} in {location}")
+        self.commands.set_query(f"{query} {location}")
         
-        self.driver.get(search_url)
-        time.sleep(3)
+        # Classify the page as soon as it settles instead of waiting out a timeout
+        state = self.guard.open(self.driver, search_url, f"{query} {location}", deadline)
+        if state not in (PAGE_RESULTS, PAGE_DETAIL):
+            print(f"Results didn't load properly ({state} page)")
+            return None
         
-        # Wait for results to load
-        try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "[role='main']"))
-            )
-        except TimeoutException:
-            print("Results didn't load properly")
-            return []
+        if self.delta:
+            self.delta.start_query(f"{query} {location}")
         
         # Scroll to load more results
-        self._scroll_results()
+        self._scroll_results(deadline)
         
         # Extract business information
-        businesses = self._extract_business_data()
-        return businesses
+        try:
+            return self._extract_business_data(f"{query} {location}", max_results, deadline)
+        except CommandBudgetExceeded:
+            if self.delta:
+                self.delta.abandon_query(f"{query} {location}")
+            raise
     
-    def _scroll_results(self):
+    def _scroll_results(self, deadline=None):
         scrollable_div = self.driver.find_element(By.CSS_SELECTOR, "[role='main']")
         last_height = self.driver.execute_script("return arguments[0].scrollHeight", scrollable_div)
         
@@ -68,22 +97,52 @@ class GoogleMapsScraper:
             time.sleep(2)
             
             new_height = self.driver.execute_script("return arguments[0].scrollHeight", scrollable_div)
-            if new_height == last_height:
+            if new_height == last_height or (deadline and time.time() >= deadline):
                 break
             last_height = new_height
     
-    def _extract_business_data(self):
+    def _extract_business_data(self, query="", max_results=None, deadline=None):
         businesses = []
+        skipped = 0
         business_elements = self.driver.find_elements(By.CSS_SELECTOR, "[data-result-index]")
+        cards = []
+        if self.delta and business_elements:
+            # Every listed card counts as still there, including the ones past
+            # this run's result budget, or they would be reported as disappeared
+            cards = self.driver.execute_script(CARDS_SCRIPT, business_elements) or []
+            for card in cards:
+                self.delta.see_card(card)
+        business_elements = business_elements[:max_results]
+        
+        for i, element in enumerate(business_elements):
+            if deadline and time.time() >= deadline:
+                print(f"Time budget used up after {i} of {len(business_elements)} businesses")
+                if self.delta:
+                    self.delta.abandon_query(query)
+                break
+            with self.commands.business(f"result {i+1}") as entry:
+                try:
+                    card_fp = None
+                    business_data = None
+                    if self.delta and i < len(cards):
+                        # Unchanged list card: reuse last run's record instead of opening the detail pane
+                        card_fp = card_fingerprint(cards[i])
+                        business_data = self.delta.lookup_card(card_fp)
+                        if business_data:
+                            skipped += 1
+                    if not business_data:
+                        business_data = self._extract_single_business(element)
+                    if business_data:
+                        entry['business'] = business_data.name
+                        if self.delta:
+                            self.delta.observe(business_data, query, card_fp)
+                        businesses.append(business_data)
+                except Exception as e:
+                    print(f"Error extracting business data: {e}")
+                    continue
         
-        for element in business_elements:
-            try:
-                business_data = self._extract_single_business(element)
-                if business_data:
-                    businesses.append(business_data)
-            except Exception as e:
-                print(f"Error extracting business data: {e}")
-                continue
+        if skipped:
+            print(f"Skipped {skipped} unchanged businesses")
                 
         return businesses
     
@@ -101,14 +160,7 @@ class GoogleMapsScraper:
             website = self._extract_website()
             
             if name:
-                return {
-                    'name': name,
-                    'address': address,
-                    'phone': phone,
-                    'rating': rating,
-                    'website': website,
-                    'has_website': bool(website)
-                }
+                return Business(name=name, address=address, phone=phone, rating=rating, website=website)
                 
         except Exception as e:
             print(f"Error extracting business: {e}")
@@ -124,39 +176,30 @@ class GoogleMapsScraper:
     
     def _extract_website(self):
         try:
-            website_elements = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='http']")
-            for element in website_elements:
-                href = element.get_attribute('href')
-                if href and not any(domain in href for domain in ['google.com', 'maps.google.com', 'goo.gl']):
-                    return href
+            return get_classifier().find_website(collect_links(self.driver))
         except Exception:
             pass
         return ""
     
     def filter_no_website(self, businesses):
-        return [b for b in businesses if not b['has_website']]
+        return [b for b in businesses if not b.has_website]
     
     def save_to_csv(self, businesses, filename="prospects.csv"):
         if not businesses:
             print("No businesses to save")
             return
             
-        fieldnames = ['name', 'address', 'phone', 'rating', 'website', 'has_website']
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(businesses)
+        write_csv(businesses, filename, self.FIELDS)
         
         print(f"Saved {len(businesses)} businesses to {filename}")
     
     def save_to_json(self, businesses, filename="prospects.json"):
-        with open(filename, 'w', encoding='utf-8') as jsonfile:
-            json.dump(businesses, jsonfile, indent=2, ensure_ascii=False)
+        write_json(businesses, filename, self.FIELDS)
         
         print(f"Saved {len(businesses)} businesses to {filename}")
     
     def close(self):
+        self.commands.report()
         self.driver.quit()
 
 
@@ -177,17 +220,34 @@ def main():
         "medical practices"
     ]
     
-    scraper = GoogleMapsScraper(headless=False)  # Set to True for headless mode
+    location = "Battle Creek, Michigan"
+    
+    # Pass --delta to report only new, changed and disappeared businesses since the last run
+    delta_mode = "--delta" in sys.argv[1:]
+    # Pass --minutes N to stop after N minutes; highest-yield queries run first
+    try:
+        time_budget = time_budget_from_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"Invalid --minutes: {e}")
+        sys.exit(2)
+    planner = QueryPlanner()
+    
+    scraper = GoogleMapsScraper(headless=False, delta=delta_mode)  # Set headless=True for headless mode
     all_businesses = []
     
     try:
-        for query in search_queries:
+        def search(query, max_results, deadline):
             print(f"\n--- Searching for {query} ---")
-            businesses = scraper.search_businesses(query)
-            all_businesses.extend(businesses)
-            
+            return scraper.search_businesses(query, location, max_results, deadline)
+        
+        stopped = None
+        try:
             # Add delay between searches to avoid rate limiting
-            time.sleep(5)
+            planner.run(search, search_queries, location, time_budget, total_results=20 * len(search_queries),
+                        pause=5, results=all_businesses)
+        except (BlockedError, CommandBudgetExceeded) as e:
+            print(f"\nStopping early: {e}")
+            stopped = e
         
         # Filter businesses without websites
         no_website_businesses = scraper.filter_no_website(all_businesses)
@@ -203,7 +263,15 @@ def main():
             # Print summary
             print("\n--- PROSPECTS WITHOUT WEBSITES ---")
             for business in no_website_businesses[:10]:  # Show first 10
-                print(f"• {business['name']} - {business['phone']} - {business['address']}")
+                print(f"• {business.name} - {business.phone} - {business.address}")
+        
+        if scraper.delta:
+            scraper.delta.save_delta("battle_creek_delta.json")
+            scraper.delta.save()
+        
+        # Strict command budgets have to fail the run, after the results are saved
+        if isinstance(stopped, CommandBudgetExceeded):
+            sys.exit(1)
         
     except KeyboardInterrupt:
         print("\nScraping interrupted by user")
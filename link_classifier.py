@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Link classifier for website and social-link detection
+Sorts every link on a business page into own website, social, directory or
+internal using a hostname-suffix trie built from link_domains.txt.
+"""
+
+import os
+from urllib.parse import urlparse, parse_qs
+
+
+LINK_WEBSITE = 'website'
+LINK_SOCIAL = 'social'
+LINK_DIRECTORY = 'directory'
+LINK_INTERNAL = 'internal'
+
+DEFAULT_DOMAINS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'link_domains.txt')
+
+# Finds the open detail pane: the [role='main'] container around the business
+# name. The results list stays mounted next to it, and its cards carry other
+# businesses' Website links, so links are never read from the whole document.
+DETAIL_PANE_JS = """
+const title = document.querySelector("h1.DUwDvf") || document.querySelector("h1");
+const pane = title && title.closest("[role='main']");
+"""
+
+# Returns every absolute link in the detail pane in a single round trip
+LINKS_SCRIPT = DETAIL_PANE_JS + """
+return pane ? Array.from(pane.querySelectorAll("a[href^='http']"), a => a.href) : [];
+"""
+
+_KIND = ''
+
+
+class LinkClassifier:
+    def __init__(self, domains_file=DEFAULT_DOMAINS_FILE):
+        # Nested dicts keyed by hostname label, last label first; _KIND marks a listed domain
+        self.trie = {}
+        if domains_file:
+            self.load(domains_file)
+
+    def load(self, domains_file):
+        kind = None
+        with open(domains_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip().lower()
+                if not line:
+                    continue
+                if line.startswith('[') and line.endswith(']'):
+                    kind = line[1:-1]
+                    continue
+                if kind is None:
+                    raise ValueError(f"{domains_file}: domain '{line}' outside of a section")
+                self.add(line, kind)
+
+    def add(self, domain, kind):
+        node = self.trie
+        for label in reversed(domain.strip('.').split('.')):
+            node = node.setdefault(label, {})
+        node[_KIND] = kind
+
+    def classify_host(self, host):
+        """Walk the host from its last label; the longest listed suffix wins."""
+        kind = LINK_WEBSITE
+        node = self.trie
+        for label in reversed(host.lower().rstrip('.').split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            kind = node.get(_KIND, kind)
+        return kind
+
+    def unwrap(self, href):
+        """Resolve a Google redirect wrapper (google.com/url?q=...) to its target."""
+        parsed = urlparse(href)
+        if parsed.path == '/url' and parsed.hostname and self.classify_host(parsed.hostname) == LINK_INTERNAL:
+            query = parse_qs(parsed.query)
+            target = query.get('q') or query.get('url')
+            if target:
+                return target[0]
+        return href
+
+    def classify(self, href):
+        if not href:
+            return LINK_INTERNAL
+        parsed = urlparse(self.unwrap(href))
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            return LINK_INTERNAL
+        return self.classify_host(parsed.hostname)
+
+    def summarize(self, hrefs):
+        """First own website, social and directory link among hrefs."""
+        summary = {LINK_WEBSITE: '', LINK_SOCIAL: '', LINK_DIRECTORY: ''}
+        for href in hrefs:
+            kind = self.classify(href)
+            if kind in summary and not summary[kind]:
+                summary[kind] = self.unwrap(href)
+        return summary
+
+    def find_website(self, hrefs):
+        for href in hrefs:
+            if self.classify(href) == LINK_WEBSITE:
+                return self.unwrap(href)
+        return ""
+
+
+_default_classifier = None
+
+
+def get_classifier():
+    """Shared classifier built from the file in GMAPS_LINK_DOMAINS, or the bundled list."""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = LinkClassifier(os.environ.get('GMAPS_LINK_DOMAINS', DEFAULT_DOMAINS_FILE))
+    return _default_classifier
+
+
+def collect_links(driver):
+    return driver.execute_script(LINKS_SCRIPT) or []
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Offline locality index for target regions
+Maps ZIP codes and city/state names from the bundled localities.json to
+target regions, so addresses are accepted or rejected with a dict lookup
+instead of hard-coded substring checks.
+"""
+
+import json
+import os
+import re
+
+from business import LOCALITY_PARTS, split_address
+
+
+DEFAULT_LOCALITIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'localities.json')
+DEFAULT_REGIONS = ['battle_creek']
+
+STATE_NAMES = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'florida': 'FL', 'georgia': 'GA',
+    'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA',
+    'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD',
+    'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO',
+    'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ',
+    'new mexico': 'NM', 'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH',
+    'oklahoma': 'OK', 'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC',
+    'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
+    'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+}
+
+# Places without a street address are listed by plus code: "V2C8+2X Battle Creek, Michigan"
+PLUS_CODE = re.compile(r'^[23456789CFGHJMPQRVWX]{4,8}\+[23456789CFGHJMPQRVWX]{0,3}[\s,]*')
+
+
+def parse_locality(address):
+    """(city, state abbreviation, zip) of an address; parts that can't be found are ''."""
+    street, locality = split_address(PLUS_CODE.sub('', (address or '').strip()))
+    match = LOCALITY_PARTS.search(locality or street)
+    if not match:
+        return '', '', ''
+    state = match.group('state').strip()
+    state = STATE_NAMES.get(state.lower(), state.upper())
+    return match.group('city').strip().lower(), state, match.group('zip') or ''
+
+
+class LocalityIndex:
+    def __init__(self, regions=None, localities_file=DEFAULT_LOCALITIES_FILE):
+        with open(localities_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        self.regions = list(regions or DEFAULT_REGIONS)
+        unknown = [region for region in self.regions if region not in data]
+        if unknown:
+            raise ValueError(f"Unknown regions {unknown}; {localities_file} has {sorted(data)}")
+
+        self.by_zip = {}
+        self.by_city = {}
+        for region in self.regions:
+            entry = data[region]
+            for zip_code in entry.get('zips', []):
+                self.by_zip[zip_code] = region
+            for city in entry.get('cities', []):
+                self.by_city[(city.lower(), entry['state'])] = region
+        # Addresses repeat the same locality over and over, so remember each answer
+        self.cache = {}
+
+    @classmethod
+    def from_env(cls):
+        """Regions from GMAPS_REGIONS (comma separated), Battle Creek by default."""
+        regions = os.environ.get('GMAPS_REGIONS')
+        return cls([region.strip() for region in regions.split(',')] if regions else DEFAULT_REGIONS)
+
+    def region_of(self, address):
+        """Target region of an address, or None if it's outside every configured region."""
+        address = PLUS_CODE.sub('', address.strip())
+        _, locality = split_address(address)
+        key = locality or address
+        if key in self.cache:
+            return self.cache[key]
+
+        city, state, zip_code = parse_locality(address)
+        region = self.by_zip.get(zip_code) if zip_code else None
+        if region is None:
+            region = self.by_city.get((city, state))
+        self.cache[key] = region
+        return region
+
+    def accepts(self, address):
+        return bool(address) and self.region_of(address) is not None
+
+    def rejects(self, address):
+        """True for an address with a recognisable locality that lies outside every region."""
+        return bool(address) and any(parse_locality(address)) and self.region_of(address) is None
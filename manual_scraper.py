@@ -4,19 +4,49 @@ Manual Google Maps Scraper - Interactive approach
 Helps you manually identify businesses without websites
 """
 
-import time
-import csv
 import json
+import os
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
+from business import Business, write_csv, write_json
+from delta_crawl import business_key
+from link_classifier import get_classifier, DETAIL_PANE_JS
+from driver_metrics import CommandCounter
+from page_detector import PageGuard, BackoffPolicy, PAGE_CONSENT, PAGE_BLOCK
+
+
+# Reads the open detail pane in a single round trip
+PANE_SCRIPT = DETAIL_PANE_JS + """
+function text(selectors) {
+    for (const selector of selectors) {
+        const el = (pane || document).querySelector(selector);
+        if (el && el.innerText.trim()) return el.innerText.trim();
+    }
+    return '';
+}
+return {
+    name: title ? title.innerText.trim() : '',
+    address: text(["[data-item-id='address'] .Io6YTe", "[data-item-id='address']"]),
+    phone: text(["[data-item-id*='phone'] .Io6YTe", "[data-item-id*='phone']"]),
+    category: text(["button.DkEaL", "[jsaction*='category']"]),
+    website: ((pane || document).querySelector("a[data-item-id='authority']") || {}).href || '',
+    links: pane ? Array.from(pane.querySelectorAll("a[href^='http']"), a => a.href) : []
+};
+"""
 
 
 class ManualScraper:
-    def __init__(self):
+    FIELDS = ['name', 'phone', 'address', 'category', 'notes', 'website', 'has_website']
+    
+    def __init__(self, stream_file="battle_creek_manual_prospects.jsonl"):
         self.setup_driver()
         self.prospects = []
+        self.stream_file = stream_file
+        self.seen = self._load_seen()
+        # The operator handles blocks in the browser, so only log them
+        self.guard = PageGuard(policy=BackoffPolicy(base_delay=0, max_delay=0, cooldown=0, max_trips=float('inf')))
         
     def setup_driver(self):
         chrome_options = Options()
@@ -25,13 +55,17 @@ class ManualScraper:
         chrome_options.add_experimental_option('useAutomationExtension', False)
         
         self.driver = webdriver.Chrome(options=chrome_options)
+        self.commands = CommandCounter.from_env(self.driver)
         self.driver.maximize_window()
         
     def start_search(self, category="restaurants Battle Creek Michigan"):
         print(f"\nOpening Google Maps search for: {category}")
         url = f"https://www.google.com/maps/search/{category.replace(' ', '+')}"
-        self.driver.get(url)
-        time.sleep(3)
+        state = self.guard.open(self.driver, url, category)
+        if state == PAGE_CONSENT:
+            print("Google is showing a consent page - accept it in the browser to continue")
+        elif state == PAGE_BLOCK:
+            print("Google is showing an unusual-traffic check - solve it in the browser to continue")
         
     def interactive_session(self):
         print("\n" + "="*60)
@@ -40,8 +74,9 @@ class ManualScraper:
         print("This will open Google Maps where you can:")
         print("1. Browse businesses manually")
         print("2. Click on businesses to check for websites")
-        print("3. Enter prospect details when you find businesses without websites")
-        print("4. Type 'done' when finished")
+        print("3. Press Enter to capture the open business automatically")
+        print("4. Type 'm' to enter prospect details by hand")
+        print("5. Type 'done' when finished")
         print("="*60)
         
         categories = [
@@ -58,18 +93,42 @@ class ManualScraper:
             
             print(f"\nNow searching: {category}")
             print("Browse the map results and look for businesses without websites.")
-            print("When you find a prospect, press Enter to add them...")
+            print("Open a business and press Enter to capture it...")
             
             while True:
-                user_input = input("\nPress Enter to add a prospect, or type 'next' for next category, 'done' to finish: ").strip().lower()
+                user_input = input("\n[Enter] capture, 'm' manual entry, 'next' next category, 'done' finish: ").strip().lower()
                 
                 if user_input == 'done':
                     return
                 elif user_input == 'next':
                     break
-                else:
-                    # Add a prospect
+                elif user_input == 'm':
                     self.add_prospect()
+                else:
+                    self.capture_prospect(category)
+    
+    def capture_prospect(self, search_category=""):
+        try:
+            with self.commands.business(search_category) as entry:
+                pane = self.driver.execute_script(PANE_SCRIPT)
+                if pane and pane.get('name'):
+                    entry['business'] = pane['name']
+        except Exception as e:
+            print(f"Could not read the detail pane: {e}")
+            return
+        
+        if not pane or not pane.get('name'):
+            print("No business open - click a listing first")
+            return
+        
+        links = get_classifier().summarize([pane.get('website')] + pane.get('links', []))
+        if links['website']:
+            print(f"✗ {pane['name']} has a website ({links['website']}) - skipped")
+            return
+        
+        notes = f"Social only: {links['social']}" if links['social'] else ''
+        category = pane.get('category') or search_category.replace(" Battle Creek Michigan", "")
+        self._add(pane['name'], pane.get('phone', ''), pane.get('address', ''), category, notes)
     
     def add_prospect(self):
         print("\n--- Adding New Prospect ---")
@@ -83,20 +142,62 @@ class ManualScraper:
         category = input("Business type (e.g., restaurant, salon): ").strip()
         notes = input("Notes (optional): ").strip()
         
-        prospect = {
-            'name': name,
-            'phone': phone,
-            'address': address,
-            'category': category,
-            'notes': notes,
-            'website': '',
-            'has_website': False
-        }
+        self._add(name, phone, address, category, notes)
+    
+    def _add(self, name, phone, address, category, notes):
+        prospect = Business(name=name, phone=phone, address=address, category=category, notes=notes)
+        
+        key = business_key(prospect)
+        if key in self.seen:
+            print(f"Duplicate - {name} is already in your prospects")
+            return
+        self.seen.add(key)
         
         self.prospects.append(prospect)
+        self._stream(prospect)
         print(f"✓ Added: {name}")
+        if phone or address:
+            print(f"  {phone} {address}".rstrip())
         print(f"Total prospects: {len(self.prospects)}")
     
+    def _load_seen(self):
+        seen = set()
+        if not os.path.exists(self.stream_file):
+            return seen
+        
+        with open(self.stream_file, 'rb') as f:
+            data = f.read()
+        *lines, tail = data.split(b"\n")
+        for line in lines:
+            try:
+                if line.strip():
+                    seen.add(self._line_key(line))
+            except ValueError:
+                print(f"Skipping unreadable line in {self.stream_file}")
+        
+        # A crash mid-write leaves a last line without its newline: keep it if
+        # it's a whole record, cut it off if it's a fragment, so new prospects
+        # start on a fresh line either way
+        if tail.strip():
+            try:
+                seen.add(self._line_key(tail))
+            except ValueError:
+                print(f"Removing a partial last line from {self.stream_file}")
+                with open(self.stream_file, 'r+b') as f:
+                    f.truncate(len(data) - len(tail))
+            else:
+                with open(self.stream_file, 'ab') as f:
+                    f.write(b"\n")
+        return seen
+    
+    def _line_key(self, line):
+        return business_key(Business.from_dict(json.loads(line.decode('utf-8'))))
+    
+    def _stream(self, prospect):
+        # Append as we go so a crash never loses captured prospects
+        with open(self.stream_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(prospect.to_dict(self.FIELDS), ensure_ascii=False) + "\n")
+    
     def save_prospects(self):
         if not self.prospects:
             print("No prospects to save")
@@ -104,33 +205,27 @@ class ManualScraper:
             
         filename = "battle_creek_manual_prospects"
         
-        # Save CSV
-        with open(f"{filename}.csv", 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=['name', 'phone', 'address', 'category', 'notes', 'website', 'has_website'])
-            writer.writeheader()
-            writer.writerows(self.prospects)
-        
-        # Save JSON
-        with open(f"{filename}.json", 'w', encoding='utf-8') as f:
-            json.dump(self.prospects, f, indent=2, ensure_ascii=False)
+        write_csv(self.prospects, f"{filename}.csv", self.FIELDS)
+        write_json(self.prospects, f"{filename}.json", self.FIELDS)
         
         print(f"\n✓ Saved {len(self.prospects)} prospects to {filename}.csv and {filename}.json")
         
         # Display summary
         print("\n--- YOUR PROSPECTS ---")
         for i, prospect in enumerate(self.prospects, 1):
-            print(f"{i}. {prospect['name']}")
-            if prospect['phone']:
-                print(f"   Phone: {prospect['phone']}")
-            if prospect['address']:
-                print(f"   Address: {prospect['address']}")
-            if prospect['category']:
-                print(f"   Type: {prospect['category']}")
-            if prospect['notes']:
-                print(f"   Notes: {prospect['notes']}")
+            print(f"{i}. {prospect.name}")
+            if prospect.phone:
+                print(f"   Phone: {prospect.phone}")
+            if prospect.address:
+                print(f"   Address: {prospect.address}")
+            if prospect.category:
+                print(f"   Type: {prospect.category}")
+            if prospect.notes:
+                print(f"   Notes: {prospect.notes}")
             print()
     
     def close(self):
+        self.commands.report()
         self.driver.quit()
 
 
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Page state detection and block backoff
+Classifies each loaded Google Maps page right after navigation (results,
+detail, consent, block, empty) and pauses the crawl with exponential backoff
+and a circuit breaker when Google starts blocking us.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+
+PAGE_RESULTS = 'results'
+PAGE_DETAIL = 'detail'
+PAGE_CONSENT = 'consent'
+PAGE_BLOCK = 'block'
+PAGE_EMPTY = 'empty'
+PAGE_LOADING = 'loading'
+# Not opened: the backoff pause would have outlasted the time budget
+PAGE_SKIPPED = 'skipped'
+
+BLOCK_PHRASES = [
+    'unusual traffic',
+    'not a robot',
+    "systems have detected",
+]
+CONSENT_PHRASES = [
+    'before you continue to google',
+    'we use cookies and data',
+]
+EMPTY_PHRASES = [
+    "google maps can't find",
+    'no results found',
+]
+
+# Collects everything classify_page needs in a single round trip
+PROBE_SCRIPT = """
+const main = document.querySelector("[role='main']");
+return {
+    url: location.href,
+    title: document.title,
+    text: document.body ? document.body.innerText.slice(0, 3000) : '',
+    results: document.querySelectorAll(".hfpxzc, [data-result-index], div[role='article']").length,
+    detail: !!(main && main.querySelector('h1')),
+    captcha: !!document.querySelector("#captcha-form, form[action*='sorry'], iframe[src*='recaptcha']"),
+    consent_form: !!document.querySelector("form[action*='consent']")
+};
+"""
+
+
+class BlockedError(Exception):
+    pass
+
+
+def classify_page(probe):
+    """Classify a page from the dict returned by PROBE_SCRIPT."""
+    url = probe.get('url') or ''
+    parsed = urlparse(url)
+    text = (probe.get('text') or '').lower()
+
+    if parsed.hostname and parsed.hostname.startswith('consent.'):
+        return PAGE_CONSENT
+    if probe.get('consent_form') or any(phrase in text for phrase in CONSENT_PHRASES):
+        return PAGE_CONSENT
+    if parsed.path.startswith('/sorry') or probe.get('captcha') or any(phrase in text for phrase in BLOCK_PHRASES):
+        return PAGE_BLOCK
+    # Place pages can contain article elements (reviews), so trust the URL first
+    if probe.get('detail') and parsed.path.startswith('/maps/place/'):
+        return PAGE_DETAIL
+    if probe.get('results'):
+        return PAGE_RESULTS
+    if probe.get('detail'):
+        return PAGE_DETAIL
+    if any(phrase in text for phrase in EMPTY_PHRASES):
+        return PAGE_EMPTY
+    return PAGE_LOADING
+
+
+def probe_html(html, url=""):
+    """The PROBE_SCRIPT result for saved HTML, so local stand-in pages need no browser."""
+    text = re.sub(r'<[^>]+>', ' ', re.sub(r'(?is)<(script|style)[^>]*>.*?</\1>', ' ', html))
+    return {
+        'url': url,
+        'text': re.sub(r'\s+', ' ', text),
+        'results': len(re.findall(r'class="[^"]*\bhfpxzc\b|data-result-index=|role="article"', html)),
+        'detail': bool(re.search(r'role="main"[\s\S]*?<h1', html)),
+        'captcha': bool(re.search(r'id="captcha-form"|action="[^"]*sorry|src="[^"]*recaptcha', html)),
+        'consent_form': bool(re.search(r'<form[^>]+action="[^"]*consent', html)),
+    }
+
+
+def classify_html(html, url=""):
+    """Classify saved HTML without a browser, e.g. local stand-in pages."""
+    return classify_page(probe_html(html, url))
+
+
+class PageDetector:
+    def __init__(self, timeout=10, poll_interval=0.25):
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def probe(self, driver):
+        return driver.execute_script(PROBE_SCRIPT) or {}
+
+    def wait_for_page(self, driver):
+        """Poll until the page settles into a known state; a page that never settles counts as empty."""
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                state = classify_page(self.probe(driver))
+            except Exception:
+                state = PAGE_LOADING
+            if state != PAGE_LOADING:
+                return state
+            if time.time() >= deadline:
+                return PAGE_EMPTY
+            time.sleep(self.poll_interval)
+
+
+class BackoffPolicy:
+    """
+    Exponential backoff with a circuit breaker, shared by all workers.
+    After `failure_threshold` consecutive blocks the circuit opens and every
+    worker pauses for `cooldown` seconds. A block after the cooldown reopens
+    it; after `max_trips` openings the run is aborted with BlockedError.
+    `recovery_pages` healthy pages in a row forgive earlier openings.
+    """
+
+    def __init__(self, base_delay=30, max_delay=900, failure_threshold=3,
+                 cooldown=1800, max_trips=3, recovery_pages=10, log_file="block_events.jsonl"):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self.recovery_pages = recovery_pages
+        self.log_file = log_file
+        self.failures = 0
+        self.successes = 0
+        self.trips = 0
+        self.open_until = 0
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def wait(self, deadline=None, stop=None):
+        """
+        Block the calling worker while a pause is in effect. Returns False if
+        `deadline` comes first or `stop()` turns true (checked every second).
+        """
+        remaining = self.paused_until - time.time()
+        if remaining <= 0:
+            return True
+        print(f"Paused for {remaining:.0f}s after block")
+        while True:
+            now = time.time()
+            # Re-read paused_until: another worker's block may have extended it
+            if now >= self.paused_until:
+                return True
+            if (deadline and now >= deadline) or (stop and stop()):
+                return False
+            time.sleep(min(1.0, self.paused_until - now, deadline - now if deadline else 1.0))
+
+    def record(self, state, label=""):
+        if state not in (PAGE_BLOCK, PAGE_CONSENT):
+            with self.lock:
+                self.failures = 0
+                self.successes += 1
+                if self.successes >= self.recovery_pages:
+                    self.trips = 0
+            return
+
+        with self.lock:
+            self.failures += 1
+            self.successes = 0
+            now = time.time()
+            if self.failures >= self.failure_threshold:
+                # Blocks reported while the circuit is already open don't open it again
+                if now >= self.open_until:
+                    self.trips += 1
+                    self.open_until = now + self.cooldown
+                delay = self.open_until - now
+            else:
+                delay = min(self.max_delay, self.base_delay * 2 ** (self.failures - 1))
+                delay *= random.uniform(0.8, 1.2)
+            self.paused_until = max(self.paused_until, now + delay)
+            self._log_event(state, label, delay)
+
+        print(f"{state.capitalize()} page detected for '{label}' - backing off {delay:.0f}s")
+        if self.trips >= self.max_trips:
+            raise BlockedError(f"Circuit opened {self.trips} times, giving up")
+
+    def _log_event(self, state, label, delay):
+        event = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'state': state,
+            'query': label,
+            'consecutive': self.failures,
+            'backoff_seconds': round(delay, 1),
+            'circuit_open': self.failures >= self.failure_threshold,
+        }
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event) + "\n")
+
+
+class PageGuard:
+    """Navigates, classifies the loaded page and applies the backoff policy."""
+
+    def __init__(self, detector=None, policy=None):
+        self.detector = detector or PageDetector()
+        self.policy = policy or BackoffPolicy()
+
+    def open(self, driver, url, label="", deadline=None, stop=None):
+        if not self.policy.wait(deadline, stop):
+            return PAGE_SKIPPED
+        driver.get(url)
+        state = self.detector.wait_for_page(driver)
+        self.policy.record(state, label or url)
+        return state
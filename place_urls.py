@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Place URL collection for direct detail-page navigation
+Collects the /maps/place/ URLs behind the result cards in one pass so each
+business can be opened directly, cached, deduplicated, sharded and retried.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import deque
+from urllib.parse import urlparse, unquote
+
+
+# Scrolls the results feed once and returns the card URLs loaded so far
+COLLECT_SCRIPT = """
+const feed = document.querySelector("div[role='feed']");
+if (feed) feed.scrollTop = feed.scrollHeight;
+const end = !!document.querySelector("span.HlvSq");
+return {
+    urls: Array.from(document.querySelectorAll("a.hfpxzc[href*='/maps/place/']"), a => a.href),
+    end: end
+};
+"""
+
+FEATURE_ID = re.compile(r'!1s(0x[0-9a-f]+:0x[0-9a-f]+)', re.I)
+
+
+def place_id(url):
+    """Stable identity of a place URL: the feature id if present, else the place path."""
+    match = FEATURE_ID.search(url)
+    if match:
+        return match.group(1).lower()
+    path = unquote(urlparse(url).path)
+    return path.split('/@', 1)[0].rstrip('/').lower()
+
+
+def dedupe(urls):
+    seen = set()
+    unique = []
+    for url in urls:
+        key = place_id(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
+
+
+def parse_shard(value):
+    """'2/4' -> (1, 4): zero-based index and shard count."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"--shard expects i/n, e.g. 2/4, got '{value}'")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"--shard {value}: shard number must be between 1 and {max(count, 1)}")
+    return index - 1, count
+
+
+def shard(urls, num_shards, index):
+    """URLs for worker `index` of `num_shards`; stable across runs and list order."""
+    if num_shards <= 1:
+        return list(urls)
+    return [
+        url for url in urls
+        if int(hashlib.md5(place_id(url).encode('utf-8')).hexdigest(), 16) % num_shards == index
+    ]
+
+
+def collect_place_urls(driver, max_results=None, max_scrolls=20, pause=1.5):
+    """Scroll the results feed until it stops growing and return the deduplicated place URLs."""
+    urls = []
+    for _ in range(max_scrolls):
+        batch = driver.execute_script(COLLECT_SCRIPT) or {}
+        found = dedupe(batch.get('urls', []))
+        grew = len(found) > len(urls)
+        urls = found
+        if batch.get('end') or not grew or (max_results and len(urls) >= max_results):
+            break
+        time.sleep(pause)
+    return urls[:max_results] if max_results else urls
+
+
+class PlaceUrlCache:
+    def __init__(self, cache_file="place_urls.json", max_age_days=7):
+        self.cache_file = cache_file
+        self.max_age = max_age_days * 86400
+        self.entries = self._read()
+
+    def _read(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError:
+            print(f"Ignoring unreadable {self.cache_file}")
+            return {}
+
+    def get(self, query, max_results=None):
+        """Cached URLs for query, or None if missing, stale or collected with a smaller limit."""
+        entry = self.entries.get(query)
+        if not entry or time.time() - entry['collected'] > self.max_age:
+            return None
+        limit = entry.get('max_results')
+        # A list shorter than its limit is the whole result list, good for any limit
+        complete = limit is None or len(entry['urls']) < limit
+        if not complete and (max_results is None or max_results > limit):
+            return None
+        return entry['urls']
+
+    def put(self, query, urls, max_results=None):
+        # Shard workers share the file: merge with what's on disk and replace it atomically
+        entries = self._read()
+        for key, entry in self.entries.items():
+            if key not in entries or entries[key]['collected'] < entry['collected']:
+                entries[key] = entry
+        entries[query] = {'collected': time.time(), 'max_results': max_results, 'urls': urls}
+        self.entries = entries
+
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+
+class PlaceQueue:
+    """Work queue of place URLs; failed URLs are retried on their own, without re-searching."""
+
+    def __init__(self, urls, max_attempts=3):
+        self.max_attempts = max_attempts
+        self.pending = deque((url, 1) for url in dedupe(urls))
+        self.failed = []
+        self.current = None
+
+    def __len__(self):
+        return len(self.pending)
+
+    def __iter__(self):
+        while self.pending:
+            self.current = self.pending.popleft()
+            yield self.current[0]
+
+    def retry(self):
+        """Requeue the URL just handed out, or give up on it after max_attempts."""
+        url, attempts = self.current
+        if attempts < self.max_attempts:
+            self.pending.append((url, attempts + 1))
+        else:
+            self.failed.append(url)
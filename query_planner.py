@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Yield-driven query planner
+Remembers how many no-website prospects each category x location produced per
+minute of crawling, runs the best queries first with result budgets in
+proportion to their yield, and stops when the time budget runs out.
+"""
+
+import json
+import os
+import re
+import time
+
+
+class QueryPlanner:
+    def __init__(self, stats_file="query_yield.json", decay=0.7, min_results=3, max_results=40):
+        self.stats_file = stats_file
+        self.decay = decay
+        self.min_results = min_results
+        self.max_results = max_results
+        self.stats = self._read()
+
+    def _read(self):
+        if not os.path.exists(self.stats_file):
+            return {}
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError:
+            print(f"Ignoring unreadable {self.stats_file}")
+            return {}
+
+    def _key(self, category, location):
+        # "Battle Creek, Michigan" and "Battle Creek Michigan" share stats
+        normalize = lambda value: re.sub(r'[^a-z0-9]+', ' ', value.lower()).strip()
+        return f"{normalize(category)}|{normalize(location)}"
+
+    def yield_rate(self, category, location):
+        """Prospects per minute; queries we have never run get the best known rate so they get tried."""
+        entry = self.stats.get(self._key(category, location))
+        if entry and entry['minutes'] > 0:
+            return entry['prospects'] / entry['minutes']
+        known = [e['prospects'] / e['minutes'] for e in self.stats.values() if e['minutes'] > 0]
+        return max(known) if known else 1.0
+
+    def plan(self, categories, location, total_results=None):
+        """(category, max_results) pairs, highest yield first."""
+        rates = {category: self.yield_rate(category, location) for category in categories}
+        ordered = sorted(categories, key=lambda c: rates[c], reverse=True)
+        if total_results is None:
+            return [(category, None) for category in ordered]
+
+        total_rate = sum(rates.values()) or 1.0
+        plan = []
+        for category in ordered:
+            budget = round(total_results * rates[category] / total_rate)
+            plan.append((category, max(self.min_results, min(self.max_results, budget))))
+        return plan
+
+    def record(self, category, location, prospects, minutes, results):
+        # Older runs fade out so the planner follows changes in the market
+        entry = self.stats.setdefault(self._key(category, location),
+                                      {'prospects': 0.0, 'minutes': 0.0, 'results': 0.0, 'runs': 0})
+        entry['prospects'] = entry['prospects'] * self.decay + prospects
+        entry['minutes'] = entry['minutes'] * self.decay + minutes
+        entry['results'] = entry['results'] * self.decay + results
+        entry['runs'] += 1
+
+    def save(self):
+        # Write and rename, so an interrupted save never leaves a half-written file
+        tmp_file = f"{self.stats_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.stats, f, indent=2)
+        os.replace(tmp_file, self.stats_file)
+
+    def run(self, scrape, categories, location, time_budget=None, total_results=None, pause=3, results=None):
+        """
+        Call scrape(category, max_results, deadline) for each planned query
+        until the time budget (minutes) runs out, recording the yield of every
+        query. scrape returns None when the search didn't load (block, consent,
+        empty page or error), which is not recorded as a zero yield; it should
+        stop early once time.time() passes `deadline` (None for no limit).
+        Businesses are appended to `results` as they come in, so callers keep
+        them if the run is interrupted.
+        """
+        deadline = time.time() + time_budget * 60 if time_budget else None
+        all_businesses = results if results is not None else []
+
+        try:
+            for category, max_results in self.plan(categories, location, total_results):
+                if deadline and time.time() >= deadline:
+                    print(f"\nTime budget of {time_budget} minutes used up - skipping remaining queries")
+                    break
+
+                start = time.time()
+                businesses = scrape(category, max_results, deadline)
+                minutes = (time.time() - start) / 60
+                if businesses is None:
+                    print(f"  {category}: search didn't load - yield not recorded")
+                    time.sleep(pause)
+                    continue
+                prospects = sum(1 for b in businesses if not b.has_website)
+                self.record(category, location, prospects, minutes, len(businesses))
+                all_businesses.extend(businesses)
+                print(f"  {category}: {prospects} prospects in {minutes:.1f} min")
+
+                time.sleep(pause)  # Delay between searches
+        finally:
+            self.save()
+
+        return all_businesses
+
+
+def time_budget_from_args(args):
+    """Minutes passed as --minutes N, or None for no limit; ValueError if N is missing or not positive."""
+    if "--minutes" not in args:
+        return None
+    index = args.index("--minutes") + 1
+    try:
+        minutes = float(args[index])
+    except (IndexError, ValueError):
+        value = f"'{args[index]}'" if index < len(args) else "nothing"
+        raise ValueError(f"--minutes expects a number of minutes, e.g. 30, got {value}")
+    if not minutes > 0:
+        raise ValueError(f"--minutes {args[index]}: the time budget must be more than 0 minutes")
+    return minutes
@@ -3,5 +3,5 @@
 
 echo "Starting Google Maps scraper..."
 source venv/bin/activate
-python3 gmaps_scraper.py
+python3 gmaps_scraper.py "$@"
 echo "Scraping complete. Check the generated CSV and JSON files for results."
\ No newline at end of file
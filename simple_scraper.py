@@ -5,19 +5,25 @@ Uses a more reliable approach to find businesses without websites.
 """
 
 import time
-import csv
-import json
+import sys
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException
+from business import Business, write_csv, write_json
+from locality_index import LocalityIndex
+from link_classifier import get_classifier, collect_links
+from page_detector import PageGuard, BlockedError, PAGE_RESULTS
+from query_planner import QueryPlanner, time_budget_from_args
+from driver_metrics import CommandCounter, CommandBudgetExceeded
 
 
 class SimpleScraper:
-    def __init__(self):
+    def __init__(self, localities=None):
         self.setup_driver()
+        # Target regions come from GMAPS_REGIONS (Battle Creek area by default)
+        self.localities = localities or LocalityIndex.from_env()
+        self.guard = PageGuard()
         
     def setup_driver(self):
         chrome_options = Options()
@@ -27,26 +33,24 @@ class SimpleScraper:
         chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36")
         
         self.driver = webdriver.Chrome(options=chrome_options)
+        self.commands = CommandCounter.from_env(self.driver)
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
-    def scrape_category(self, category):
+    def scrape_category(self, category, max_results=20, deadline=None):
+        """Businesses for one category, or None if the search page didn't load."""
         print(f"\nSearching for: {category}")
+        self.commands.set_query(category)
         
         # Use direct Google Maps search
         url = f"https://www.google.com/maps/search/{category}+Battle+Creek+Michigan"
-        self.driver.get(url)
+        state = self.guard.open(self.driver, url, category, deadline)
         
-        # Wait and let page load
-        time.sleep(5)
-        
-        businesses = []
+        if state != PAGE_RESULTS:
+            print(f"No business listings ({state} page)")
+            return None
         
+        businesses = []        
         try:
-            # Look for business listings
-            WebDriverWait(self.driver, 10).until(
-                lambda d: d.find_elements(By.CSS_SELECTOR, "div[role='article'], .hfpxzc, .Nv2PK")
-            )
-            
             # Scroll to load more results
             for i in range(3):
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
@@ -56,28 +60,36 @@ class SimpleScraper:
             business_elements = self.driver.find_elements(By.CSS_SELECTOR, "div[role='article'], .hfpxzc")
             print(f"Found {len(business_elements)} potential businesses")
             
-            for i, element in enumerate(business_elements[:20]):  # Limit to first 20
-                try:
-                    # Click on business
-                    self.driver.execute_script("arguments[0].click();", element)
-                    time.sleep(2)
+            for i, element in enumerate(business_elements[:max_results]):
+                if deadline and time.time() >= deadline:
+                    print("Time budget used up - stopping this category")
+                    break
+                
+                with self.commands.business(f"result {i+1}") as entry:
+                    try:
+                        # Click on business
+                        self.driver.execute_script("arguments[0].click();", element)
+                        time.sleep(2)
                     
-                    # Extract data
-                    business = self.extract_business_info()
-                    if business and business['name']:
-                        businesses.append(business)
-                        print(f"  {i+1}. {business['name']} - Website: {'Yes' if business['website'] else 'No'}")
+                        # Extract data
+                        business = self.extract_business_info(category)
+                        if business and business.name:
+                            entry['business'] = business.name
+                            businesses.append(business)
+                            print(f"  {i+1}. {business.name} - Website: {'Yes' if business.website else 'No'}")
                         
-                except Exception as e:
-                    print(f"  Error with business {i+1}: {e}")
-                    continue
+                    except Exception as e:
+                        print(f"  Error with business {i+1}: {e}")
+                        continue
                     
+        except CommandBudgetExceeded:
+            raise
         except Exception as e:
             print(f"Error loading businesses: {e}")
             
         return businesses
     
-    def extract_business_info(self):
+    def extract_business_info(self, category='Unknown'):
         try:
             # Try multiple selectors for name
             name = ""
@@ -92,15 +104,23 @@ class SimpleScraper:
             
             # Extract address
             address = ""
+            outside = ""
             for selector in ["[data-item-id='address'] .Io6YTe", ".Io6YTe"]:
                 try:
                     addr_elem = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    address = addr_elem.text.strip()
-                    if address and "Battle Creek" in address:
+                    text = addr_elem.text.strip()
+                    if self.localities.accepts(text):
+                        address = text
                         break
+                    if self.localities.rejects(text):
+                        outside = outside or text
                 except:
                     continue
             
+            if name and outside and not address:
+                print(f"  Skipping {name} - {outside} is outside the target regions")
+                return None
+            
             # Extract phone
             phone = ""
             for selector in ["[data-item-id*='phone'] .Io6YTe", "[aria-label*='Phone']"]:
@@ -115,24 +135,12 @@ class SimpleScraper:
             # Check for website
             website = ""
             try:
-                website_links = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='http']")
-                for link in website_links:
-                    href = link.get_attribute('href')
-                    if href and not any(x in href for x in ['google.com', 'maps.google', 'goo.gl', 'facebook.com']):
-                        website = href
-                        break
+                website = get_classifier().find_website(collect_links(self.driver))
             except:
                 pass
             
             if name:
-                return {
-                    'name': name,
-                    'address': address,
-                    'phone': phone,
-                    'website': website,
-                    'has_website': bool(website),
-                    'category': 'Unknown'
-                }
+                return Business(name=name, address=address, phone=phone, website=website, category=category)
                 
         except Exception as e:
             print(f"Error extracting business info: {e}")
@@ -145,37 +153,32 @@ class SimpleScraper:
             return
             
         # Filter businesses without websites
-        no_website = [b for b in businesses if not b['has_website']]
+        no_website = [b for b in businesses if not b.has_website]
         
         print(f"\nTotal businesses found: {len(businesses)}")
         print(f"Businesses without websites: {len(no_website)}")
         
         if no_website:
-            # Save CSV
-            with open(f"{filename_base}.csv", 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=['name', 'address', 'phone', 'website', 'has_website', 'category'])
-                writer.writeheader()
-                writer.writerows(no_website)
-            
-            # Save JSON
-            with open(f"{filename_base}.json", 'w', encoding='utf-8') as f:
-                json.dump(no_website, f, indent=2, ensure_ascii=False)
+            fields = ['name', 'address', 'phone', 'website', 'has_website', 'category']
+            write_csv(no_website, f"{filename_base}.csv", fields)
+            write_json(no_website, f"{filename_base}.json", fields)
             
             print(f"\nProspects saved to {filename_base}.csv and {filename_base}.json")
             
             # Show first few prospects
             print("\n--- TOP PROSPECTS (NO WEBSITE) ---")
             for i, biz in enumerate(no_website[:10]):
-                print(f"{i+1}. {biz['name']}")
-                if biz['phone']:
-                    print(f"   Phone: {biz['phone']}")
-                if biz['address']:
-                    print(f"   Address: {biz['address']}")
+                print(f"{i+1}. {biz.name}")
+                if biz.phone:
+                    print(f"   Phone: {biz.phone}")
+                if biz.address:
+                    print(f"   Address: {biz.address}")
                 print()
         
         return no_website
     
     def close(self):
+        self.commands.report()
         self.driver.quit()
 
 
@@ -189,17 +192,30 @@ def main():
         "contractors"
     ]
     
+    # Pass --minutes N to stop after N minutes; highest-yield categories run first
+    try:
+        time_budget = time_budget_from_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"Invalid --minutes: {e}")
+        sys.exit(2)
+    planner = QueryPlanner()
+    
     scraper = SimpleScraper()
     all_businesses = []
     
     try:
-        for category in categories:
-            businesses = scraper.scrape_category(category)
-            all_businesses.extend(businesses)
-            time.sleep(3)  # Delay between categories
+        planner.run(scraper.scrape_category, categories, "Battle Creek, Michigan", time_budget,
+                    total_results=20 * len(categories), results=all_businesses)
         
         scraper.save_results(all_businesses)
         
+    except BlockedError as e:
+        print(f"\nStopping early: {e}")
+        scraper.save_results(all_businesses)
+    except CommandBudgetExceeded as e:
+        print(f"\nStopping early: {e}")
+        scraper.save_results(all_businesses)
+        sys.exit(1)
     except KeyboardInterrupt:
         print("\nStopped by user")
     except Exception as e:
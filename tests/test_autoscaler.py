@@ -0,0 +1,130 @@
+import time
+
+import pytest
+
+from autoscaler import AIMDController, WorkerPool
+from driver_metrics import CommandBudgetExceeded
+from page_detector import BackoffPolicy, BlockedError
+
+
+class FakeScraper:
+    started = 0
+    closed = 0
+
+    def __init__(self):
+        FakeScraper.started += 1
+
+    def close(self):
+        FakeScraper.closed += 1
+
+
+def test_out_of_headroom_decreases_once_per_cooldown():
+    controller = AIMDController(max_workers=8, headroom=lambda: (0.0, 0.0), cooldown=60)
+    controller.target = 8
+
+    for _ in range(3):
+        controller.adjust()
+
+    assert controller.target == 4
+
+
+def test_out_of_headroom_decreases_again_after_cooldown():
+    controller = AIMDController(max_workers=8, headroom=lambda: (0.0, 0.0), cooldown=0)
+    controller.target = 8
+
+    controller.adjust()
+    controller.adjust()
+
+    assert controller.target == 2
+
+
+def test_workers_are_reused_across_runs():
+    FakeScraper.started = FakeScraper.closed = 0
+    controller = AIMDController(min_workers=2, max_workers=2, headroom=lambda: (1.0, 1.0))
+    pool = WorkerPool(FakeScraper, controller, interval=0.01)
+
+    first = pool.run([1, 2, 3], lambda scraper, task: task * 10)
+    second = pool.run([4, 5], lambda scraper, task: task * 100)
+    started = FakeScraper.started
+    pool.close()
+
+    assert sorted(first) == [10, 20, 30]
+    assert sorted(second) == [400, 500]
+    assert started == 2
+    assert FakeScraper.closed == 2
+
+
+def test_failed_tasks_are_retried_then_given_up():
+    controller = AIMDController(headroom=lambda: (1.0, 1.0))
+    pool = WorkerPool(FakeScraper, controller, max_attempts=2, interval=0.01)
+
+    results = pool.run(["ok", "bad"], lambda scraper, task: task if task == "ok" else None)
+    pool.close()
+
+    assert results == ["ok"]
+    assert pool.failed == ["bad"]
+
+
+def test_command_budget_stops_the_pool():
+    def handle(scraper, task):
+        raise CommandBudgetExceeded(f"task {task}")
+
+    pool = WorkerPool(FakeScraper, AIMDController(headroom=lambda: (1.0, 1.0)), interval=0.01)
+    with pytest.raises(CommandBudgetExceeded):
+        pool.run([1, 2], handle)
+    pool.close()
+
+
+class DeadBrowser(Exception):
+    pass
+
+
+def test_dead_browser_is_replaced():
+    FakeScraper.started = FakeScraper.closed = 0
+    dead = set()
+
+    def handle(scraper, task):
+        # The first browser dies on its first page
+        if FakeScraper.started == 1 and not dead:
+            dead.add(scraper)
+            raise DeadBrowser("invalid session id")
+        assert scraper not in dead
+        return task
+
+    pool = WorkerPool(FakeScraper, AIMDController(headroom=lambda: (1.0, 1.0)), interval=0.01,
+                      restart_on=(DeadBrowser,))
+    results = pool.run([1, 2, 3], handle)
+    pool.close()
+
+    assert sorted(results) == [1, 2, 3]
+    assert pool.failed == []
+    assert FakeScraper.started == 2
+    assert FakeScraper.closed == 2
+
+
+def test_block_ends_the_backoff_pauses_of_other_workers(tmp_path):
+    policy = BackoffPolicy(log_file=str(tmp_path / 'events.jsonl'))
+    policy.paused_until = time.time() + 1800
+    controller = AIMDController(min_workers=2, max_workers=2, headroom=lambda: (1.0, 1.0))
+    pool = WorkerPool(FakeScraper, controller, interval=0.01)
+
+    def handle(scraper, task):
+        if task == 'blocked':
+            time.sleep(0.1)
+            raise BlockedError("Circuit opened 3 times, giving up")
+        return task if policy.wait(stop=pool.stopping) else None
+
+    start = time.time()
+    with pytest.raises(BlockedError):
+        pool.run(['paused', 'blocked'], handle)
+    pool.close()
+    assert time.time() - start < 5
+
+
+def test_false_finishes_a_task_without_a_result():
+    pool = WorkerPool(FakeScraper, AIMDController(headroom=lambda: (1.0, 1.0)), interval=0.01)
+    results = pool.run([1, 2, 3], lambda scraper, task: task if task != 2 else False)
+    pool.close()
+
+    assert sorted(results) == [1, 3]
+    assert pool.failed == []
@@ -0,0 +1,90 @@
+import pytest
+
+from business import Business, BusinessBatch, split_address
+
+
+def joe(**kwargs):
+    fields = dict(name="Joe's Diner", address="12 Main St, Battle Creek, MI 49017", phone="555-0100",
+                  website="", rating="4.5", category="Diner", notes="")
+    fields.update(kwargs)
+    return Business(**fields)
+
+
+@pytest.mark.parametrize('address, street, locality', [
+    ("12 Main St, Battle Creek, MI 49017", "12 Main St", "Battle Creek, MI 49017"),
+    ("12 Main St, Battle Creek, MI 49017-1234", "12 Main St", "Battle Creek, MI 49017-1234"),
+    ("12 Main St, Battle Creek, MI 49017, USA", "12 Main St", "Battle Creek, MI 49017, USA"),
+    ("12 Main St, Suite 4, Battle Creek, Michigan", "12 Main St, Suite 4", "Battle Creek, Michigan"),
+    ("12 Main St", "12 Main St", ""),
+    ("", "", ""),
+])
+def test_split_address(address, street, locality):
+    assert split_address(address) == (street, locality)
+
+
+def test_dict_round_trip():
+    business = joe(website="https://joesdiner.com/")
+    data = business.to_dict()
+    assert data['address'] == "12 Main St, Battle Creek, MI 49017"
+    assert data['has_website'] is True
+    assert Business.from_dict(data).to_dict() == data
+
+
+def test_from_dict_fills_missing_fields():
+    business = Business.from_dict({'name': "Joe's Diner", 'phone': None})
+    assert business.phone == ''
+    assert business.address == ''
+    assert not business.has_website
+
+
+def test_address_get_and_set():
+    business = joe()
+    assert (business.street, business.locality) == ("12 Main St", "Battle Creek, MI 49017")
+
+    business.address = "3 Elm St, Marshall, MI 49068"
+    assert business.address == "3 Elm St, Marshall, MI 49068"
+    assert business.locality == "Marshall, MI 49068"
+
+    business.address = "Battle Creek, Michigan"
+    assert business.address == "Battle Creek, Michigan"
+    assert business.locality == ''
+
+
+def test_to_row_follows_the_field_order():
+    business = joe()
+    assert business.to_row() == ["Joe's Diner", "12 Main St, Battle Creek, MI 49017", "555-0100", "",
+                                 False, "4.5", "Diner", ""]
+    assert business.to_row(['phone', 'name']) == ["555-0100", "Joe's Diner"]
+
+
+def test_locality_and_category_are_interned():
+    # Built at runtime so the strings aren't shared constants
+    first = joe(address="12 Main St, " + "".join(["Battle Creek", ", MI 49017"]), category="".join(["Di", "ner"]))
+    second = joe(address="3 Elm St, " + "".join(["Battle Creek", ", MI 49017"]), category="".join(["Din", "er"]))
+    assert first.locality is second.locality
+    assert first.category is second.category
+
+
+def test_slots_reject_unknown_fields():
+    with pytest.raises(AttributeError):
+        joe().email = "joe@joesdiner.com"
+
+
+def test_batch_columns_and_items():
+    businesses = [joe(), joe(name="Pipes Inc", address="3 Elm St, Marshall, MI 49068", website="https://pipes.com/")]
+    batch = BusinessBatch(businesses)
+
+    assert len(batch) == 2
+    assert batch[1].name == "Pipes Inc"
+    assert batch[1].address == "3 Elm St, Marshall, MI 49068"
+    assert batch.column('address') == [b.address for b in businesses]
+    assert batch.column('has_website') == [False, True]
+    assert batch.counts('category') == {"Diner": 2}
+    assert batch.to_rows() == [b.to_row() for b in businesses]
+
+
+def test_batch_without_website():
+    batch = BusinessBatch([joe(), joe(name="Pipes Inc", website="https://pipes.com/")])
+    prospects = batch.without_website()
+    assert isinstance(prospects, BusinessBatch)
+    assert [b.name for b in prospects] == ["Joe's Diner"]
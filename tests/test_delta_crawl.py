@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from business import Business
+from delta_crawl import DeltaTracker, card_fingerprint
+
+
+def make_card(name, *parts, website=False):
+    return {'name': name, 'parts': list(parts), 'website': website}
+
+
+def test_card_fingerprint_ignores_hours_and_reviews():
+    morning = make_card("Joe's Diner", "4.5", "(120)", "Diner", "12 Main St", "Open ⋅ Closes 9 PM")
+    evening = make_card("Joe's Diner", "4.6", "(124)", "Diner", "12 Main St", "Closed ⋅ Opens 7 AM")
+    assert card_fingerprint(morning) == card_fingerprint(evening)
+
+
+def test_card_fingerprint_tracks_website_button_and_address():
+    card = make_card("Joe's Diner", "Diner", "12 Main St")
+    assert card_fingerprint(card) != card_fingerprint(make_card("Joe's Diner", "Diner", "12 Main St", website=True))
+    assert card_fingerprint(card) != card_fingerprint(make_card("Joe's Diner", "Diner", "14 Main St"))
+
+
+def run(tmp_path, businesses, listed=()):
+    tracker = DeltaTracker(str(tmp_path / "state.json"))
+    tracker.start_query("q")
+    for name in listed:
+        tracker.see_card(make_card(name))
+    for business in businesses:
+        tracker.see_card(make_card(business.name))
+        tracker.observe(business, "q")
+    return tracker
+
+
+def test_failed_extraction_is_not_reported_as_disappeared(tmp_path):
+    joe = Business("Joe", "12 Main St, Battle Creek, MI 49017", "555-0100")
+    ann = Business("Ann", "3 Elm St, Battle Creek, MI 49017", "555-0101")
+    run(tmp_path, [joe, ann]).save()
+
+    # Ann's card is still listed but her detail pane failed to load
+    tracker = run(tmp_path, [joe], listed=["Ann"])
+    assert tracker.compute_delta()['disappeared'] == []
+    tracker.save()
+
+    # Next run Ann's card is gone from the list
+    tracker = run(tmp_path, [joe])
+    assert [record['name'] for record in tracker.compute_delta()['disappeared']] == ["Ann"]
+
+
+def businesses(count):
+    return [Business(f"Biz {i}", f"{i} Main St, Battle Creek, MI 49017") for i in range(count)]
+
+
+def test_cards_past_a_smaller_budget_are_kept(tmp_path):
+    run(tmp_path, businesses(20)).save()
+
+    # Next week the planner gives the query a budget of 5, but all 20 cards are still listed
+    tracker = run(tmp_path, businesses(5), listed=[b.name for b in businesses(20)])
+    assert tracker.compute_delta()['disappeared'] == []
+    tracker.save()
+
+    with open(tmp_path / "state.json", encoding="utf-8") as f:
+        assert len(json.load(f)['records']) == 20
+
+
+class StubElement:
+    def __init__(self, card):
+        self.card = card
+
+
+class StubDriver:
+    def __init__(self, cards):
+        self.elements = [StubElement(card) for card in cards]
+
+    def execute(self, driver_command, params=None):
+        return None
+
+    def find_elements(self, by, value):
+        return list(self.elements)
+
+    def execute_script(self, script, *args):
+        return [element.card for element in args[0]]
+
+
+def test_scraper_sees_every_card_before_applying_the_budget(tmp_path):
+    pytest.importorskip("selenium")
+    pytest.importorskip("requests")
+    from driver_metrics import CommandCounter
+    from gmaps_scraper import GoogleMapsScraper
+
+    def crawl(max_results):
+        scraper = GoogleMapsScraper.__new__(GoogleMapsScraper)
+        scraper.driver = StubDriver([make_card(b.name) for b in businesses(20)])
+        scraper.delta = DeltaTracker(str(tmp_path / "state.json"))
+        scraper.commands = CommandCounter(scraper.driver)
+        details = {b.name: b for b in businesses(20)}
+        scraper._extract_single_business = lambda element: details[element.card['name']]
+        scraper.delta.start_query("q")
+        found = scraper._extract_business_data("q", max_results)
+        return scraper.delta, found
+
+    tracker, _ = crawl(20)
+    tracker.save()
+
+    tracker, found = crawl(5)
+    assert len(found) == 5
+    assert tracker.compute_delta()['disappeared'] == []
@@ -0,0 +1,116 @@
+import pytest
+
+from driver_metrics import CommandCounter, CommandBudgetExceeded
+
+
+class StubElement:
+    def __init__(self, driver, selector):
+        self.driver = driver
+        self.selector = selector
+
+    @property
+    def text(self):
+        return self.driver.execute('getElementText', {'id': self.selector})
+
+
+class StubDriver:
+    """Stands in for a WebDriver: like the real one, every call goes through execute()."""
+
+    def __init__(self, page=None, missing=LookupError):
+        self.page = page or {}
+        self.missing = missing
+
+    def execute(self, driver_command, params=None):
+        if driver_command == 'findElement':
+            if params['value'] not in self.page:
+                raise self.missing(params['value'])
+            return StubElement(self, params['value'])
+        if driver_command == 'getElementText':
+            return self.page[params['id']]
+        return []
+
+    def find_element(self, by, value):
+        return self.execute('findElement', {'using': by, 'value': value})
+
+    def execute_script(self, script, *args):
+        return self.execute('executeScript', {'script': script, 'args': list(args)})
+
+
+DETAIL_PAGE = {
+    "h1[data-attrid='title']": "Pipes Inc",
+    "[data-item-id='address'] .Io6YTe": "12 Main St, Battle Creek, MI 49017",
+    "[data-item-id*='phone'] .Io6YTe": "(269) 555-0100",
+}
+
+
+def test_commands_are_counted_per_business():
+    driver = StubDriver({'h1': 'Pipes Inc'})
+    counter = CommandCounter(driver)
+    counter.set_query('plumbers')
+
+    with counter.business('result 1') as entry:
+        driver.execute_script('return 1')
+        entry['business'] = driver.find_element('css selector', 'h1').text
+
+    [entry] = counter.businesses
+    assert entry['query'] == 'plumbers'
+    assert entry['business'] == 'Pipes Inc'
+    assert entry['count'] == 3
+    assert entry['commands'] == {'executeScript': 1, 'findElement': 1, 'getElementText': 1}
+
+
+def test_strict_budget_raises():
+    driver = StubDriver()
+    counter = CommandCounter(driver, budget=2, strict=True)
+
+    with pytest.raises(CommandBudgetExceeded):
+        with counter.business('result 1'):
+            for _ in range(3):
+                driver.execute_script('return 1')
+
+    assert len(counter.violations) == 1
+
+
+def test_lenient_budget_only_warns():
+    driver = StubDriver()
+    counter = CommandCounter(driver, budget=2)
+
+    with counter.business('result 1'):
+        for _ in range(3):
+            driver.execute_script('return 1')
+
+    assert len(counter.violations) == 1
+
+
+def detail_scraper(budget=None, strict=False):
+    pytest.importorskip("selenium")
+    from selenium.common.exceptions import NoSuchElementException
+    from locality_index import LocalityIndex
+    from working_scraper import WorkingScraper
+
+    driver = StubDriver(DETAIL_PAGE, missing=NoSuchElementException)
+    scraper = WorkingScraper.__new__(WorkingScraper)
+    scraper.driver = driver
+    scraper.commands = CommandCounter(driver, budget, strict)
+    scraper.localities = LocalityIndex()
+    return scraper
+
+
+def test_extract_business_details_command_count():
+    scraper = detail_scraper()
+
+    with scraper.commands.business('result 1'):
+        business = scraper.extract_business_details()
+
+    assert business.name == 'Pipes Inc'
+    assert business.phone == '(269) 555-0100'
+    # name, address and phone: one find + one text each; links: one script
+    assert scraper.commands.businesses[0]['count'] == 7
+
+
+def test_extract_business_details_over_strict_budget():
+    scraper = detail_scraper(budget=5, strict=True)
+
+    with pytest.raises(CommandBudgetExceeded):
+        with scraper.commands.business('result 1'):
+            scraper.extract_business_details()
@@ -0,0 +1,83 @@
+import pytest
+
+from link_classifier import (
+    LinkClassifier, get_classifier, collect_links,
+    LINK_DIRECTORY, LINK_INTERNAL, LINK_SOCIAL, LINK_WEBSITE,
+)
+
+
+@pytest.mark.parametrize('href, expected', [
+    ('https://joesdiner.com/', LINK_WEBSITE),
+    ('https://notgoogle.com/menu', LINK_WEBSITE),
+    ('https://sites.google.com/view/joesdiner', LINK_WEBSITE),
+    ('https://www.google.com/maps/place/Joe', LINK_INTERNAL),
+    ('https://maps.google.com/', LINK_INTERNAL),
+    ('https://www.facebook.com/joesdiner', LINK_SOCIAL),
+    ('https://m.facebook.com/joesdiner', LINK_SOCIAL),
+    ('https://www.yelp.com/biz/joes-diner', LINK_DIRECTORY),
+    ('mailto:joe@joesdiner.com', LINK_INTERNAL),
+    ('', LINK_INTERNAL),
+])
+def test_classify(href, expected):
+    assert get_classifier().classify(href) == expected
+
+
+def test_google_redirects_are_unwrapped():
+    classifier = get_classifier()
+    href = 'https://www.google.com/url?q=https://joesdiner.com/&sa=U'
+    assert classifier.unwrap(href) == 'https://joesdiner.com/'
+    assert classifier.classify(href) == LINK_WEBSITE
+    assert classifier.classify('https://www.google.com/url?q=https://www.facebook.com/joe') == LINK_SOCIAL
+    # Only Google's own /url wrapper is unwrapped
+    assert classifier.unwrap('https://joesdiner.com/url?q=https://x.com/') == 'https://joesdiner.com/url?q=https://x.com/'
+
+
+def test_longest_listed_suffix_wins():
+    classifier = LinkClassifier(None)
+    classifier.add('example.com', LINK_DIRECTORY)
+    classifier.add('shop.example.com', LINK_WEBSITE)
+    assert classifier.classify_host('example.com') == LINK_DIRECTORY
+    assert classifier.classify_host('listings.example.com') == LINK_DIRECTORY
+    assert classifier.classify_host('joe.shop.example.com') == LINK_WEBSITE
+    assert classifier.classify_host('anotherexample.com') == LINK_WEBSITE
+
+
+def test_domain_outside_a_section_is_rejected(tmp_path):
+    domains = tmp_path / 'domains.txt'
+    domains.write_text("# no section yet\nfacebook.com\n", encoding='utf-8')
+    with pytest.raises(ValueError):
+        LinkClassifier(str(domains))
+
+
+def test_summarize_and_find_website():
+    classifier = get_classifier()
+    hrefs = [
+        'https://www.google.com/maps/dir/',
+        'https://www.facebook.com/joesdiner',
+        'https://www.yelp.com/biz/joes-diner',
+        'https://www.google.com/url?q=https://joesdiner.com/',
+    ]
+    assert classifier.summarize(hrefs) == {
+        LINK_WEBSITE: 'https://joesdiner.com/',
+        LINK_SOCIAL: 'https://www.facebook.com/joesdiner',
+        LINK_DIRECTORY: 'https://www.yelp.com/biz/joes-diner',
+    }
+    assert classifier.find_website(hrefs) == 'https://joesdiner.com/'
+    assert classifier.find_website(hrefs[:3]) == ''
+
+
+class StubDriver:
+    def __init__(self, links):
+        self.links = links
+        self.scripts = []
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+        return self.links
+
+
+def test_collect_links_reads_the_detail_pane_only():
+    driver = StubDriver(None)
+    assert collect_links(driver) == []
+    assert "closest(\"[role='main']\")" in driver.scripts[0]
+    assert 'document.querySelectorAll' not in driver.scripts[0]
@@ -0,0 +1,35 @@
+import pytest
+
+from locality_index import DEFAULT_REGIONS, LocalityIndex, parse_locality
+
+
+def test_default_regions():
+    assert LocalityIndex().regions == DEFAULT_REGIONS
+    assert not LocalityIndex().accepts("100 Main St, Kalamazoo, MI 49007")
+
+
+@pytest.mark.parametrize("address", [
+    "12 Main St, Battle Creek, MI 49017",
+    "12 Main St, Battle Creek, Michigan",
+    "V2C8+2X Battle Creek, Michigan",
+    "V2C8+2X, Battle Creek, MI 49017",
+    "86JRV2C8+2X Battle Creek, MI",
+])
+def test_accepts_battle_creek_addresses(address):
+    assert LocalityIndex().accepts(address)
+
+
+def test_plus_code_is_not_part_of_the_city():
+    assert parse_locality("V2C8+2X Battle Creek, Michigan") == ("battle creek", "MI", "")
+
+
+def test_rejects_addresses_outside_the_regions():
+    index = LocalityIndex(["battle_creek", "kalamazoo"])
+    assert index.accepts("100 Main St, Kalamazoo, MI 49007")
+    assert not index.accepts("1 Woodward Ave, Detroit, MI 48226")
+    assert not index.accepts("")
+
+
+def test_unknown_region():
+    with pytest.raises(ValueError):
+        LocalityIndex(["atlantis"])
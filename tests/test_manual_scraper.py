@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from driver_metrics import CommandCounter
+from manual_scraper import ManualScraper
+
+
+class StubDriver:
+    """Returns `pane` for the detail pane script, like a browser with one business open."""
+
+    def __init__(self, pane=None):
+        self.pane = pane
+
+    def execute(self, driver_command, params=None):
+        return self.pane
+
+    def execute_script(self, script, *args):
+        return self.execute('executeScript', {'script': script, 'args': list(args)})
+
+
+def record(name, address="12 Main St, Battle Creek, MI 49017"):
+    return json.dumps({'name': name, 'address': address, 'phone': ''})
+
+
+def scraper(tmp_path, pane=None):
+    scraper = ManualScraper.__new__(ManualScraper)
+    scraper.driver = StubDriver(pane)
+    scraper.commands = CommandCounter(scraper.driver)
+    scraper.prospects = []
+    scraper.stream_file = str(tmp_path / "prospects.jsonl")
+    scraper.seen = scraper._load_seen()
+    return scraper
+
+
+def stream_lines(scraper):
+    with open(scraper.stream_file, encoding='utf-8') as f:
+        return f.read().split("\n")
+
+
+def test_complete_last_line_without_newline_is_kept(tmp_path):
+    (tmp_path / "prospects.jsonl").write_text(record("A") + "\n" + record("B"), encoding='utf-8')
+
+    manual = scraper(tmp_path)
+
+    assert len(manual.seen) == 2
+    assert stream_lines(manual) == [record("A"), record("B"), ""]
+
+
+def test_partial_last_line_is_cut_off(tmp_path):
+    (tmp_path / "prospects.jsonl").write_text(record("A") + "\n" + record("B")[:10], encoding='utf-8')
+
+    manual = scraper(tmp_path)
+
+    assert len(manual.seen) == 1
+    assert stream_lines(manual) == [record("A"), ""]
+
+
+def test_unreadable_complete_line_is_skipped_not_deleted(tmp_path):
+    (tmp_path / "prospects.jsonl").write_text("not json\n" + record("A") + "\n", encoding='utf-8')
+
+    manual = scraper(tmp_path)
+
+    assert len(manual.seen) == 1
+    assert stream_lines(manual) == ["not json", record("A"), ""]
+
+
+def test_duplicates_are_rejected_across_sessions(tmp_path):
+    manual = scraper(tmp_path)
+    manual._add("Joe's Diner", "555-0100", "12 Main St, Battle Creek, MI 49017", "Diner", "")
+    manual._add("Joe's Diner", "555-0100", "12 Main St, Battle Creek, MI 49017", "Diner", "")
+    assert len(manual.prospects) == 1
+
+    manual = scraper(tmp_path)
+    manual._add("joe's  diner", "", "12 Main St, Battle Creek, MI 49017", "Diner", "")
+    assert manual.prospects == []
+    assert len(stream_lines(manual)) == 2
+
+
+def test_capture_prospect_with_social_links_only(tmp_path):
+    manual = scraper(tmp_path, {
+        'name': "Joe's Diner", 'address': "12 Main St, Battle Creek, MI 49017", 'phone': "555-0100",
+        'category': "Diner", 'website': '', 'links': ["https://www.facebook.com/joesdiner"],
+    })
+
+    manual.capture_prospect("restaurants Battle Creek Michigan")
+
+    [prospect] = manual.prospects
+    assert prospect.name == "Joe's Diner"
+    assert prospect.category == "Diner"
+    assert "facebook.com" in prospect.notes
+    assert manual.commands.businesses[0]['business'] == "Joe's Diner"
+
+
+def test_capture_prospect_skips_businesses_with_a_website(tmp_path):
+    manual = scraper(tmp_path, {
+        'name': "Pipes Inc", 'address': '', 'phone': '', 'category': "Plumber",
+        'website': "https://pipesinc.com/", 'links': [],
+    })
+
+    manual.capture_prospect("plumbers Battle Creek Michigan")
+
+    assert manual.prospects == []
+
+
+def test_capture_prospect_without_an_open_business(tmp_path):
+    manual = scraper(tmp_path, None)
+    manual.capture_prospect()
+    assert manual.prospects == []
@@ -0,0 +1,112 @@
+import os
+import time
+
+import pytest
+
+from page_detector import (
+    BackoffPolicy, BlockedError, PageDetector, PageGuard, classify_html, probe_html,
+    PAGE_BLOCK, PAGE_CONSENT, PAGE_DETAIL, PAGE_EMPTY, PAGE_LOADING, PAGE_RESULTS, PAGE_SKIPPED,
+)
+
+PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+
+def load(name):
+    with open(os.path.join(PAGES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('page, url, expected', [
+    ('results.html', 'https://www.google.com/maps/search/restaurants', PAGE_RESULTS),
+    ('detail.html', "https://www.google.com/maps/place/Joe's+Diner/", PAGE_DETAIL),
+    ('consent.html', 'https://consent.google.com/m?continue=https://www.google.com/maps', PAGE_CONSENT),
+    ('consent.html', 'https://www.google.com/maps/search/restaurants', PAGE_CONSENT),
+    ('block.html', 'https://www.google.com/sorry/index', PAGE_BLOCK),
+    ('block.html', 'https://www.google.com/maps/search/restaurants', PAGE_BLOCK),
+    ('empty.html', 'https://www.google.com/maps/search/zzqx', PAGE_EMPTY),
+    ('loading.html', 'https://www.google.com/maps/search/restaurants', PAGE_LOADING),
+])
+def test_classify_stand_in_pages(page, url, expected):
+    assert classify_html(load(page), url) == expected
+
+
+class StandInDriver:
+    """Answers the detector's probe from a local page instead of a browser."""
+
+    def __init__(self, page, url):
+        self.html = load(page)
+        self.url = url
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def execute_script(self, script, *args):
+        return probe_html(self.html, self.url)
+
+
+def test_detector_gives_up_on_a_page_that_never_settles():
+    detector = PageDetector(timeout=0.05, poll_interval=0.01)
+    assert detector.wait_for_page(StandInDriver('loading.html', 'https://www.google.com/maps')) == PAGE_EMPTY
+    assert detector.wait_for_page(StandInDriver('block.html', 'https://www.google.com/sorry/index')) == PAGE_BLOCK
+
+
+def make_policy(tmp_path, **kwargs):
+    return BackoffPolicy(base_delay=0, max_delay=0, log_file=str(tmp_path / 'events.jsonl'), **kwargs)
+
+
+def test_repeated_blocks_while_open_count_as_one_trip(tmp_path):
+    policy = make_policy(tmp_path, failure_threshold=3, cooldown=60, max_trips=3)
+    for _ in range(6):
+        policy.record(PAGE_BLOCK, 'q')
+    assert policy.trips == 1
+    assert len(open(tmp_path / 'events.jsonl').readlines()) == 6
+
+
+def test_block_after_cooldown_reopens_and_aborts(tmp_path):
+    policy = make_policy(tmp_path, failure_threshold=1, cooldown=0, max_trips=2)
+    policy.record(PAGE_BLOCK, 'q')
+    with pytest.raises(BlockedError):
+        policy.record(PAGE_BLOCK, 'q')
+
+
+def test_healthy_pages_forgive_earlier_trips(tmp_path):
+    policy = make_policy(tmp_path, failure_threshold=1, cooldown=0, max_trips=2, recovery_pages=3)
+    policy.record(PAGE_BLOCK, 'q')
+    for _ in range(3):
+        policy.record(PAGE_RESULTS, 'q')
+    assert policy.trips == 0
+    policy.record(PAGE_BLOCK, 'q')
+    assert policy.trips == 1
+
+
+def test_pause_is_cut_short_by_the_deadline(tmp_path):
+    policy = make_policy(tmp_path)
+    policy.paused_until = time.time() + 1800
+
+    start = time.time()
+    assert policy.wait(deadline=time.time() + 0.05) is False
+    assert time.time() - start < 1
+
+
+def test_guard_skips_the_page_when_the_pause_outlasts_the_deadline(tmp_path):
+    policy = make_policy(tmp_path)
+    policy.paused_until = time.time() + 1800
+    guard = PageGuard(PageDetector(timeout=0.05, poll_interval=0.01), policy)
+
+    driver = StandInDriver('results.html', 'https://www.google.com/maps/search/restaurants')
+    assert guard.open(driver, driver.url, 'q', deadline=time.time()) == PAGE_SKIPPED
+    assert driver.visited == []
+
+    policy.paused_until = 0
+    assert guard.open(driver, driver.url, 'q', deadline=time.time() + 60) == PAGE_RESULTS
+    assert driver.visited == [driver.url]
+
+
+def test_pause_ends_when_the_caller_stops(tmp_path):
+    policy = make_policy(tmp_path)
+    policy.paused_until = time.time() + 1800
+
+    start = time.time()
+    assert policy.wait(stop=lambda: time.time() - start > 0.05) is False
+    assert time.time() - start < 2
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from place_urls import PlaceUrlCache, parse_shard, shard
+
+
+def urls(count):
+    return [f"https://www.google.com/maps/place/Biz+{i}/data=!4m7!3m6!1s0x1:0x{i:x}" for i in range(count)]
+
+
+def test_cache_misses_when_budget_grows(tmp_path):
+    cache = PlaceUrlCache(str(tmp_path / "urls.json"))
+    cache.put("plumbers", urls(10), max_results=10)
+    assert cache.get("plumbers", 5) == urls(10)
+    assert cache.get("plumbers", 10) == urls(10)
+    assert cache.get("plumbers", 20) is None
+
+
+def test_short_list_is_complete_for_any_budget(tmp_path):
+    cache = PlaceUrlCache(str(tmp_path / "urls.json"))
+    cache.put("plumbers", urls(4), max_results=10)
+    assert cache.get("plumbers", 40) == urls(4)
+
+
+def test_concurrent_workers_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "urls.json")
+    first, second = PlaceUrlCache(path), PlaceUrlCache(path)
+    first.put("plumbers", urls(3), max_results=10)
+    second.put("dentists", urls(2), max_results=10)
+    with open(path, encoding="utf-8") as f:
+        assert set(json.load(f)) == {"plumbers", "dentists"}
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "urls.json"
+    path.write_text('{"plumbers": {"collec')
+    assert PlaceUrlCache(str(path)).get("plumbers") is None
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (1, 4)
+    for value in ["0/3", "4/3", "1/0", "x"]:
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+def test_shards_partition_the_urls():
+    all_urls = urls(50)
+    parts = [shard(all_urls, 3, index) for index in range(3)]
+    assert sorted(sum(parts, [])) == sorted(all_urls)
@@ -0,0 +1,66 @@
+import pytest
+
+from business import Business
+from query_planner import QueryPlanner, time_budget_from_args
+
+
+def test_failed_search_is_not_recorded_as_zero_yield(tmp_path):
+    planner = QueryPlanner(str(tmp_path / "yield.json"))
+    found = {"plumbers": [Business("Pipes Inc")], "dentists": None}
+
+    results = planner.run(lambda category, max_results, deadline: found[category],
+                          ["plumbers", "dentists"], "Battle Creek, Michigan", pause=0)
+
+    assert [b.name for b in results] == ["Pipes Inc"]
+    assert planner._key("plumbers", "Battle Creek, Michigan") in planner.stats
+    assert planner._key("dentists", "Battle Creek, Michigan") not in planner.stats
+
+
+def test_scrape_gets_the_deadline(tmp_path):
+    planner = QueryPlanner(str(tmp_path / "yield.json"))
+    deadlines = []
+
+    def scrape(category, max_results, deadline):
+        deadlines.append(deadline)
+        return []
+
+    planner.run(scrape, ["plumbers"], "Battle Creek, Michigan", time_budget=5, pause=0)
+    planner.run(scrape, ["plumbers"], "Battle Creek, Michigan", pause=0)
+
+    assert deadlines[0] is not None and deadlines[1] is None
+
+
+def test_unreadable_stats_file_is_ignored(tmp_path):
+    stats_file = tmp_path / "yield.json"
+    stats_file.write_text('{"plumbers|battle creek michigan": {"prosp', encoding='utf-8')
+
+    planner = QueryPlanner(str(stats_file))
+    assert planner.stats == {}
+
+    planner.record("plumbers", "Battle Creek, Michigan", 2, 1.0, 5)
+    planner.save()
+    assert QueryPlanner(str(stats_file)).stats == planner.stats
+    assert [path.name for path in tmp_path.iterdir()] == ["yield.json"]
+
+
+@pytest.mark.parametrize('args, expected', [
+    ([], None),
+    (["--delta"], None),
+    (["--minutes", "30"], 30.0),
+    (["--parallel", "--minutes", "2.5"], 2.5),
+])
+def test_time_budget_from_args(args, expected):
+    assert time_budget_from_args(args) == expected
+
+
+@pytest.mark.parametrize('args', [
+    ["--minutes"],
+    ["--minutes", "half an hour"],
+    ["--minutes", "--delta"],
+    ["--minutes", "0"],
+    ["--minutes", "-5"],
+    ["--minutes", "nan"],
+])
+def test_invalid_time_budget(args):
+    with pytest.raises(ValueError):
+        time_budget_from_args(args)
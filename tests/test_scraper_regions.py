@@ -0,0 +1,98 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from selenium.common.exceptions import NoSuchElementException
+
+from driver_metrics import CommandCounter
+from locality_index import LocalityIndex
+from simple_scraper import SimpleScraper
+from working_scraper import WorkingScraper
+
+
+class StubElement:
+    def __init__(self, driver, selector):
+        self.driver = driver
+        self.selector = selector
+
+    @property
+    def text(self):
+        return self.driver.execute('getElementText', {'id': self.selector})
+
+
+class StubDriver:
+    """A detail pane as a dict of selector -> text; every call goes through execute(), like the real driver."""
+
+    def __init__(self, page):
+        self.page = page
+
+    def execute(self, driver_command, params=None):
+        if driver_command == 'findElement':
+            if params['value'] not in self.page:
+                raise NoSuchElementException(params['value'])
+            return StubElement(self, params['value'])
+        if driver_command == 'getElementText':
+            return self.page[params['id']]
+        return []
+
+    def find_element(self, by, value):
+        return self.execute('findElement', {'using': by, 'value': value})
+
+    def execute_script(self, script, *args):
+        return self.execute('executeScript', {'script': script, 'args': list(args)})
+
+
+def detail_page(address):
+    return {
+        "h1": "Pipes Inc",
+        "h1[data-attrid='title']": "Pipes Inc",
+        "[data-item-id='address'] .Io6YTe": address,
+        ".Io6YTe": address,
+        "[data-item-id*='phone'] .Io6YTe": "(269) 555-0100",
+    }
+
+
+def scraper(cls, address):
+    scraper = cls.__new__(cls)
+    scraper.driver = StubDriver(detail_page(address))
+    scraper.commands = CommandCounter(scraper.driver)
+    scraper.localities = LocalityIndex()
+    return scraper
+
+
+def test_locality_index_rejects_only_recognised_addresses():
+    index = LocalityIndex()
+    assert index.rejects("100 Main St, Kalamazoo, MI 49007")
+    assert not index.rejects("12 Main St, Battle Creek, MI 49017")
+    # Not an address at all, e.g. another row of the pane
+    assert not index.rejects("Open 24 hours")
+    assert not index.rejects("")
+
+
+def test_simple_scraper_keeps_businesses_in_the_region():
+    business = scraper(SimpleScraper, "12 Main St, Battle Creek, MI 49017").extract_business_info("plumbers")
+    assert business.address == "12 Main St, Battle Creek, MI 49017"
+
+
+def test_simple_scraper_skips_businesses_outside_the_regions():
+    assert scraper(SimpleScraper, "100 Main St, Kalamazoo, MI 49007").extract_business_info("plumbers") is None
+
+
+def test_working_scraper_keeps_businesses_in_the_region():
+    business = scraper(WorkingScraper, "12 Main St, Battle Creek, MI 49017").extract_business_details()
+    assert business.address == "12 Main St, Battle Creek, MI 49017"
+    assert business.phone == "(269) 555-0100"
+
+
+def test_working_scraper_skips_businesses_outside_the_regions():
+    assert scraper(WorkingScraper, "100 Main St, Kalamazoo, MI 49007").extract_business_details() is False
+
+
+def test_business_without_an_address_is_kept():
+    page = detail_page("")
+    del page["[data-item-id='address'] .Io6YTe"], page[".Io6YTe"]
+    working = scraper(WorkingScraper, "")
+    working.driver.page = page
+    business = working.extract_business_details()
+    assert business.name == "Pipes Inc"
+    assert business.address == ""
@@ -5,18 +5,30 @@ Uses a step-by-step approach to reliably extract business data
 """
 
 import time
-import csv
-import json
+import sys
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException
+from business import Business, write_csv, write_json
+from locality_index import LocalityIndex
+from link_classifier import get_classifier, collect_links
+from page_detector import PageGuard, BlockedError, PAGE_RESULTS, PAGE_DETAIL
+from place_urls import PlaceUrlCache, PlaceQueue, collect_place_urls, parse_shard, shard
+from query_planner import QueryPlanner, time_budget_from_args
+from autoscaler import AIMDController, WorkerPool
+from driver_metrics import CommandCounter, CommandBudgetExceeded
 
 
 class WorkingScraper:
-    def __init__(self):
+    def __init__(self, policy=None, localities=None):
         self.setup_driver()
+        # Target regions come from GMAPS_REGIONS (Battle Creek area by default)
+        self.localities = localities or LocalityIndex.from_env()
+        # Parallel workers share one backoff policy so a block pauses all of them
+        self.guard = PageGuard(policy=policy)
         
     def setup_driver(self):
         chrome_options = Options()
@@ -24,25 +36,24 @@ class WorkingScraper:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         
         self.driver = webdriver.Chrome(options=chrome_options)
+        self.commands = CommandCounter.from_env(self.driver)
         self.driver.maximize_window()
         
-    def scrape_businesses(self, search_term, max_results=15):
+    def scrape_businesses(self, search_term, max_results=15, deadline=None):
+        """Businesses for one search, or None if the search results didn't load."""
         print(f"\nSearching: {search_term}")
+        self.commands.set_query(search_term)
         
         # Navigate to Google Maps
         url = f"https://www.google.com/maps/search/{search_term.replace(' ', '+')}"
-        self.driver.get(url)
-        time.sleep(4)
+        state = self.guard.open(self.driver, url, search_term, deadline)
         
-        businesses = []
+        if state != PAGE_RESULTS:
+            print(f"Search results didn't load ({state} page)")
+            return None
         
+        businesses = []        
         try:
-            # Wait for search results
-            WebDriverWait(self.driver, 10).until(
-                lambda d: len(d.find_elements(By.CSS_SELECTOR, "[data-result-index]")) > 0 or
-                         len(d.find_elements(By.CSS_SELECTOR, ".hfpxzc")) > 0
-            )
-            
             # Get business elements (try multiple selectors)
             business_elements = []
             for selector in ["[data-result-index]", ".hfpxzc", "div[role='article']"]:
@@ -57,41 +68,126 @@ class WorkingScraper:
             for i, element in enumerate(business_elements[:max_results]):
                 if i >= max_results:
                     break
+                if deadline and time.time() >= deadline:
+                    print("Time budget used up - stopping this search")
+                    break
                     
-                try:
-                    print(f"Processing business {i+1}...")
+                with self.commands.business(f"result {i+1}") as entry:
+                    try:
+                        print(f"Processing business {i+1}...")
                     
-                    # Click on business
-                    self.driver.execute_script("arguments[0].click();", element)
-                    time.sleep(2)
+                        # Click on business
+                        self.driver.execute_script("arguments[0].click();", element)
+                        time.sleep(2)
                     
-                    # Extract business details
-                    business = self.extract_business_details()
+                        # Extract business details
+                        business = self.extract_business_details()
                     
-                    if business and business.get('name'):
-                        businesses.append(business)
-                        website_status = "✓ Has website" if business.get('website') else "✗ No website"
-                        print(f"  {business['name']} - {website_status}")
-                    else:
-                        print(f"  Could not extract details for business {i+1}")
+                        if business and business.name:
+                            entry['business'] = business.name
+                            businesses.append(business)
+                            website_status = "✓ Has website" if business.website else "✗ No website"
+                            print(f"  {business.name} - {website_status}")
+                        elif business is None:
+                            print(f"  Could not extract details for business {i+1}")
                         
-                except Exception as e:
-                    print(f"  Error processing business {i+1}: {e}")
-                    continue
+                    except Exception as e:
+                        print(f"  Error processing business {i+1}: {e}")
+                        continue
                     
+        except CommandBudgetExceeded:
+            raise
         except Exception as e:
             print(f"Error during search: {e}")
             
         return businesses
     
+    def find_place_urls(self, search_term, max_results=15, cache=None, num_shards=1, shard_index=0, deadline=None):
+        """Place URLs behind the result cards, from the cache or one pass over the results list; None if the search didn't load."""
+        print(f"\nSearching: {search_term}")
+        
+        urls = cache.get(search_term, max_results) if cache else None
+        if urls is None:
+            url = f"https://www.google.com/maps/search/{search_term.replace(' ', '+')}"
+            state = self.guard.open(self.driver, url, search_term, deadline)
+            if state != PAGE_RESULTS:
+                print(f"Search results didn't load ({state} page)")
+                return None
+            urls = collect_place_urls(self.driver, max_results)
+            if cache:
+                cache.put(search_term, urls, max_results)
+        else:
+            print(f"Using {len(urls)} cached place URLs")
+        
+        urls = shard(urls[:max_results], num_shards, shard_index)
+        print(f"Found {len(urls)} place URLs")
+        return urls
+    
+    def scrape_place(self, url, search_term="", deadline=None, stop=None):
+        """Open one place page directly; returns None if it should be retried, False if it's out of region."""
+        self.commands.set_query(search_term)
+        with self.commands.business(url) as entry:
+            state = self.guard.open(self.driver, url, search_term, deadline, stop)
+            if state != PAGE_DETAIL:
+                print(f"  Place page didn't load ({state} page) - will retry")
+                return None
+            
+            business = self.extract_business_details()
+            if business:
+                entry['business'] = business.name
+        if business is False:
+            return False
+        if business and business.name:
+            website_status = "✓ Has website" if business.website else "✗ No website"
+            print(f"  {business.name} - {website_status}")
+            return business
+        return None
+    
+    def scrape_place_urls(self, search_term, max_results=15, cache=None, num_shards=1, shard_index=0, deadline=None):
+        """Collect the result card URLs once, then open each place page directly."""
+        urls = self.find_place_urls(search_term, max_results, cache, num_shards, shard_index, deadline)
+        if urls is None:
+            return None
+        queue = PlaceQueue(urls)
+        
+        businesses = []
+        for url in queue:
+            if deadline and time.time() >= deadline:
+                print(f"Time budget used up - leaving {len(queue) + 1} place URLs")
+                break
+            try:
+                business = self.scrape_place(url, search_term, deadline)
+                if business:
+                    businesses.append(business)
+                elif business is None:
+                    queue.retry()
+                    
+            except (BlockedError, CommandBudgetExceeded):
+                raise
+            except Exception as e:
+                print(f"  Error processing {url}: {e}")
+                queue.retry()
+        
+        if queue.failed:
+            print(f"Gave up on {len(queue.failed)} place URLs")
+        return businesses
+    
+    def scrape_place_urls_parallel(self, search_term, pool, max_results=15, cache=None, num_shards=1, shard_index=0,
+                                   deadline=None):
+        """Like scrape_place_urls, but the place pages are opened by an auto-scaled pool of browsers."""
+        urls = self.find_place_urls(search_term, max_results, cache, num_shards, shard_index, deadline)
+        if urls is None:
+            return None
+        businesses = pool.run(urls, lambda worker, url: worker.scrape_place(url, search_term, deadline, pool.stopping),
+                              deadline)
+        
+        if pool.failed:
+            print(f"Gave up on {len(pool.failed)} place URLs")
+        return businesses
+    
     def extract_business_details(self):
-        business = {
-            'name': '',
-            'address': '',
-            'phone': '',
-            'website': '',
-            'has_website': False
-        }
+        """Business in the open detail pane; None if it can't be read, False if it's outside the target regions."""
+        business = Business()
         
         try:
             # Extract business name - try multiple approaches
@@ -110,7 +206,7 @@ class WorkingScraper:
                     )
                     name = name_element.text.strip()
                     if name and len(name) > 1:
-                        business['name'] = name
+                        business.name = name
                         break
                 except:
                     continue
@@ -122,16 +218,23 @@ class WorkingScraper:
                 "[data-value='Address']"
             ]
             
+            outside = ""
             for selector in address_selectors:
                 try:
                     addr_element = self.driver.find_element(By.CSS_SELECTOR, selector)
                     address = addr_element.text.strip()
-                    if address and ("Battle Creek" in address or "Michigan" in address):
-                        business['address'] = address
+                    if self.localities.accepts(address):
+                        business.address = address
                         break
+                    if self.localities.rejects(address):
+                        outside = outside or address
                 except:
                     continue
             
+            if business.name and outside and not business.address:
+                print(f"  Skipping {business.name} - {outside} is outside the target regions")
+                return False
+            
             # Extract phone
             phone_selectors = [
                 "[data-item-id*='phone'] .Io6YTe",
@@ -144,37 +247,28 @@ class WorkingScraper:
                     phone_element = self.driver.find_element(By.CSS_SELECTOR, selector)
                     phone = phone_element.text.strip()
                     if phone and any(char.isdigit() for char in phone):
-                        business['phone'] = phone
+                        business.phone = phone
                         break
                 except:
                     continue
             
             # Check for website
             try:
-                # Look for website links
-                links = self.driver.find_elements(By.CSS_SELECTOR, "a[href^='http']")
-                for link in links:
-                    href = link.get_attribute('href')
-                    # Filter out Google/Maps links
-                    excluded_domains = ['google.com', 'maps.google', 'goo.gl', 'plus.google', 'facebook.com/maps']
-                    if href and not any(domain in href for domain in excluded_domains):
-                        # Check if it's actually a website link (not just any external link)
-                        link_text = link.text.lower()
-                        if any(word in link_text for word in ['website', 'visit', 'www', '.com']) or href.startswith('http'):
-                            business['website'] = href
-                            business['has_website'] = True
-                            break
+                # Social, directory and Google links don't count as a website
+                website = get_classifier().find_website(collect_links(self.driver))
+                if website:
+                    business.website = website
             except:
                 pass
             
         except Exception as e:
             print(f"    Error extracting details: {e}")
             
-        return business if business['name'] else None
+        return business if business.name else None
     
     def save_results(self, all_businesses, filename="battle_creek_businesses"):
         # Filter for businesses without websites
-        no_website = [b for b in all_businesses if not b['has_website']]
+        no_website = [b for b in all_businesses if not b.has_website]
         
         print(f"\n{'='*50}")
         print(f"SCRAPING RESULTS")
@@ -185,20 +279,13 @@ class WorkingScraper:
         
         if all_businesses:
             # Save all businesses
-            with open(f"{filename}_all.csv", 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=['name', 'address', 'phone', 'website', 'has_website'])
-                writer.writeheader()
-                writer.writerows(all_businesses)
+            fields = ['name', 'address', 'phone', 'website', 'has_website']
+            write_csv(all_businesses, f"{filename}_all.csv", fields)
             
             # Save prospects (no website)
             if no_website:
-                with open(f"{filename}_prospects.csv", 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=['name', 'address', 'phone', 'website', 'has_website'])
-                    writer.writeheader()
-                    writer.writerows(no_website)
-                
-                with open(f"{filename}_prospects.json", 'w', encoding='utf-8') as f:
-                    json.dump(no_website, f, indent=2, ensure_ascii=False)
+                write_csv(no_website, f"{filename}_prospects.csv", fields)
+                write_json(no_website, f"{filename}_prospects.json", fields)
                 
                 print(f"\n🎯 PROSPECTS (NO WEBSITE):")
                 print(f"Saved to: {filename}_prospects.csv")
@@ -206,11 +293,11 @@ class WorkingScraper:
                 
                 print(f"\n📋 TOP PROSPECTS:")
                 for i, biz in enumerate(no_website[:10], 1):
-                    print(f"{i:2d}. {biz['name']}")
-                    if biz['phone']:
-                        print(f"     📞 {biz['phone']}")
-                    if biz['address']:
-                        print(f"     📍 {biz['address']}")
+                    print(f"{i:2d}. {biz.name}")
+                    if biz.phone:
+                        print(f"     📞 {biz.phone}")
+                    if biz.address:
+                        print(f"     📍 {biz.address}")
                     print()
             
             print(f"\n✅ All results saved to {filename}_all.csv")
@@ -218,26 +305,62 @@ class WorkingScraper:
         return no_website
     
     def close(self):
+        self.commands.report()
         self.driver.quit()
 
 
 def main():
-    searches = [
-        "restaurants Battle Creek Michigan",
-        "hair salons Battle Creek Michigan",
-        "auto repair Battle Creek Michigan", 
-        "plumbers Battle Creek Michigan",
-        "dentists Battle Creek Michigan"
+    location = "Battle Creek Michigan"
+    categories = [
+        "restaurants",
+        "hair salons",
+        "auto repair", 
+        "plumbers",
+        "dentists"
     ]
     
+    # --place-urls opens each place URL directly; --shard 2/4 runs the second of four shards
+    # --parallel opens place URLs on an auto-scaled pool of up to --max-workers browsers
+    args = sys.argv[1:]
+    parallel = "--parallel" in args
+    place_mode = "--place-urls" in args or parallel
+    max_workers = int(args[args.index("--max-workers") + 1]) if "--max-workers" in args else 6
+    shard_index, num_shards = 0, 1
+    if "--shard" in args:
+        try:
+            shard_index, num_shards = parse_shard(args[args.index("--shard") + 1])
+        except (ValueError, IndexError) as e:
+            print(f"Invalid --shard: {e}")
+            sys.exit(2)
+    cache = PlaceUrlCache() if place_mode else None
+    # --minutes N stops after N minutes; highest-yield categories run first
+    try:
+        time_budget = time_budget_from_args(args)
+    except ValueError as e:
+        print(f"Invalid --minutes: {e}")
+        sys.exit(2)
+    planner = QueryPlanner()
+    
     scraper = WorkingScraper()
     all_businesses = []
+    pool = WorkerPool(lambda: WorkingScraper(policy=scraper.guard.policy, localities=scraper.localities),
+                      AIMDController(max_workers=max_workers),
+                      restart_on=(WebDriverException,)) if parallel else None
     
     try:
-        for search in searches:
-            businesses = scraper.scrape_businesses(search, max_results=10)
-            all_businesses.extend(businesses)
-            time.sleep(3)  # Delay between searches
+        def search(category, max_results, deadline):
+            search_term = f"{category} {location}"
+            if parallel:
+                return scraper.scrape_place_urls_parallel(search_term, pool, max_results=max_results, cache=cache,
+                                                          num_shards=num_shards, shard_index=shard_index,
+                                                          deadline=deadline)
+            if place_mode:
+                return scraper.scrape_place_urls(search_term, max_results=max_results, cache=cache,
+                                                 num_shards=num_shards, shard_index=shard_index, deadline=deadline)
+            return scraper.scrape_businesses(search_term, max_results=max_results, deadline=deadline)
+        
+        planner.run(search, categories, location, time_budget,
+                    total_results=10 * len(categories), results=all_businesses)
         
         prospects = scraper.save_results(all_businesses)
         
@@ -247,12 +370,21 @@ def main():
         else:
             print("\n📝 All businesses found have websites. Try different search terms or areas.")
             
+    except BlockedError as e:
+        print(f"\n\nStopping early: {e} - saving current results...")
+        scraper.save_results(all_businesses)
+    except CommandBudgetExceeded as e:
+        print(f"\n\nStopping early: {e} - saving current results...")
+        scraper.save_results(all_businesses)
+        sys.exit(1)
     except KeyboardInterrupt:
         print("\n\nStopped by user - saving current results...")
         scraper.save_results(all_businesses)
     except Exception as e:
         print(f"\nError during scraping: {e}")
     finally:
+        if pool:
+            pool.close()
         scraper.close()
 
 